@@ -5,7 +5,9 @@ Run this after updating the models.py file.
 
 import asyncio
 import logging
+import os
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy import text
 from app.config import settings
 
@@ -16,7 +18,8 @@ async def add_format_column():
     """Add format column to translation_jobs table"""
     engine = create_async_engine(
         settings.DATABASE_URL,
-        echo=True,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        poolclass=NullPool,  # one-shot script, don't keep idle connections around
     )
     
     async with engine.begin() as conn:
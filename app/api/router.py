@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 import uuid
 import logging
-from typing import Dict, Any, Optional, List
+import orjson
+from typing import Dict, Any, NamedTuple, Optional, List, Tuple
 import asyncio
 
-from app.database.db import get_db
+from app.database.db import get_db, async_session
 from app.database.models import TranslationJob, TranscriptionAndTranslationJob, JobStatus
 from app.schemas.request_schemas import (
     TranscribeVideoRequest, 
@@ -24,12 +26,84 @@ router = APIRouter()
 
 from app.services.language_service import language_service
 from app.services.translation_response_handler import translation_response_handler
+from app.services.job_status_cache import job_status_cache
+from app.services.job_commit_queue import job_commit_queue
+
+# Job ids are UUID4s; new ones are plain hex, older ones were stored with dashes
+SOURCE_ID_PATTERN = r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$"
+
+def _new_source_id() -> str:
+    """Generate a job id: a UUID4 in its 32-char hex form (no dashes)"""
+    return uuid.uuid4().hex
+
+# Bound once at import so hot paths don't go through the enum class on every request
+_IN_PROGRESS = JobStatus.IN_PROGRESS
+_FINISHED_STATUSES = frozenset({JobStatus.DONE, JobStatus.ERROR})
+
+# Status polls read only the columns they return, as plain rows rather than ORM objects.
+# The large JSON results are left out when the client only asks for the status.
+_JOB_STATUS_STMT = select(
+    TranscriptionAndTranslationJob.source_status,
+    TranscriptionAndTranslationJob.transcription,
+    TranscriptionAndTranslationJob.translations,
+).where(TranscriptionAndTranslationJob.source_id == bindparam("source_id"))
+_JOB_STATUS_ONLY_STMT = select(
+    TranscriptionAndTranslationJob.source_status,
+).where(TranscriptionAndTranslationJob.source_id == bindparam("source_id"))
+
+# Status polling is the most frequent request, so register it first
+@router.get("/transcribe-and-translate/{source_id}/status", response_model=JobStatusResponse)
+async def get_job_status(
+    source_id: str = Path(..., pattern=SOURCE_ID_PATTERN),
+    full: bool = Query(True, description="Include transcription and translations; false returns just the status"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get status of a transcription/translation job"""
+    try:
+        # Repeated polls within the cache TTL don't touch the database
+        cache_key = (source_id, full)
+        cached = job_status_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        stmt = _JOB_STATUS_STMT if full else _JOB_STATUS_ONLY_STMT
+        result = await db.execute(stmt, {"source_id": source_id})
+        row = result.mappings().first()
+        
+        if row is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+            
+        # Values come straight from the database row, so skip re-validating them
+        response = JobStatusResponse.model_construct(
+            status=row["source_status"],
+            source_id=source_id,
+            transcription=row.get("transcription"),
+            translations=row.get("translations")
+        )
+        
+        # Finished jobs won't change anymore, so keep them cached for longer
+        ttl = settings.STATUS_CACHE_DONE_TTL if row["source_status"] in _FINISHED_STATUSES else None
+        job_status_cache.set(cache_key, response, ttl=ttl)
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Unexpected error in get_job_status: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error retrieving job status"
+        )
 
 async def validate_and_extract_parameters(request: Request, route_path: str, db: AsyncSession) -> Dict[str, Any]:
     """Validate request parameters against database configuration"""
     try:
-        # Get request body as dict
-        body = await request.json()
+        # Get request body as dict, parsing it at most once per request
+        body = getattr(request.state, "body", None)
+        if body is None:
+            body = orjson.loads(await request.body())
+            request.state.body = body
         
         # Validate against database configuration
         validation_result = await workflow_db_service.validate_route_parameters(
@@ -56,6 +130,14 @@ async def validate_and_extract_parameters(request: Request, route_path: str, db:
             detail=f"Invalid request format: {str(e)}"
         )
 
+def route_parameters(route_path: str):
+    """Build a dependency that parses and validates the body for route_path"""
+    async def dependency(request: Request, db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+        # Shares the request's session with the endpoint through FastAPI's dependency cache
+        return await validate_and_extract_parameters(request, route_path, db)
+    
+    return dependency
+
 @router.get("/translation-targets")
 async def get_translation_targets(languageId: Optional[str] = Query(None), db: AsyncSession = Depends(get_db)):
     """Get translation targets for languages"""
@@ -70,10 +152,10 @@ async def get_translation_targets(languageId: Optional[str] = Query(None), db: A
                     status_code=404, 
                     detail=f"Language '{languageId}' not found"
                 )
-            return translation_targets[languageId]
+            return ORJSONResponse(translation_targets[languageId])
         
         # Return all translation targets
-        return translation_targets
+        return ORJSONResponse(translation_targets)
         
     except HTTPException:
         raise
@@ -90,7 +172,7 @@ async def get_supported_languages(db: AsyncSession = Depends(get_db)):
     try:
         # Get languages from database in the expected format
         supported_languages = await language_service.get_supported_languages_format(db)
-        return supported_languages
+        return ORJSONResponse(supported_languages)
         
     except Exception as e:
         logger.exception(f"Error in get_supported_languages: {str(e)}")
@@ -99,113 +181,118 @@ async def get_supported_languages(db: AsyncSession = Depends(get_db)):
             detail="Internal server error retrieving supported languages"
         )
 
-@router.post("/transcribe-and-translate/video")
-async def transcribe_and_translate_video(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-):
-    """Endpoint to transcribe and translate a PeerTube video"""
-    logger.info("/transcribe-and-translate/video called")
+class RouteSpec(NamedTuple):
+    """Everything a transcription route needs, resolved once at import time"""
+    name: str
+    description: str
+    error_detail: str
+    # (body key, column, default) for every optional field copied onto the job
+    mapping: Tuple[Tuple[str, str, Any], ...]
+
+# Transcription routes share one handler, specialised by their RouteSpec
+ROUTE_TABLE: Dict[str, RouteSpec] = {
+    "/transcribe-and-translate/video": RouteSpec(
+        name="transcribe_and_translate_video",
+        description="Endpoint to transcribe and translate a PeerTube video",
+        error_detail="Internal server error processing video transcription request",
+        mapping=(
+            ("videoId", "video_id", None),
+            ("peertubeInstanceBaseDomain", "peertube_basedomain", None),
+            ("language", "language", None),
+        ),
+    ),
+    "/transcribe-and-translate": RouteSpec(
+        name="transcribe_and_translate_general",
+        description="Endpoint to transcribe and translate a general URL",
+        error_detail="Internal server error processing general transcription request",
+        mapping=(
+            ("language", "language", None),
+        ),
+    ),
+}
+
+async def _create_job_and_start(source_type: str, spec: RouteSpec, params: Dict[str, Any]) -> str:
+    """Create a transcription job from validated parameters and start its workflow"""
+    source_id = _new_source_id()
     
-    try:
-        # Validate parameters against database configuration
-        validation_result = await validate_and_extract_parameters(
-            request, "/transcribe-and-translate/video", db
-        )
-        
-        params = validation_result["parameters"]
-        workflow_name = validation_result["workflow_name"]
-        
-        source_id = str(uuid.uuid4())
-        
-        # Create new job using validated parameters
-        job = TranscriptionAndTranslationJob(
-            source_id=source_id,
-            source_type=workflow_name,  # Use workflow name from database
-            url=str(params["url"]),
-            video_id=params.get("videoId"),
-            peertube_basedomain=params.get("peertubeInstanceBaseDomain"),
-            language=params.get("language"),
-            source_status=JobStatus.IN_PROGRESS
-        )
-        
-        db.add(job)
-        await db.commit()
-        
-        # Start workflow
-        await workflow_service.start_job(db, job)
-        
-        return {"source_id": source_id}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(f"Unexpected error in transcribe_and_translate_video: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal server error processing video transcription request"
-        )
+    payload = {
+        "source_id": source_id,
+        "source_type": source_type,  # Use workflow name from database
+        "url": str(params["url"]),
+        "source_status": _IN_PROGRESS,
+    }
+    for key, column, default in spec.mapping:
+        payload[column] = params.get(key, default)
+    
+    # Plain INSERT: the job is only written here, so skip the ORM unit of work.
+    # Inserts from concurrent requests are committed together in one transaction
+    await job_commit_queue.submit(TranscriptionAndTranslationJob, payload)
+    
+    # Start workflow in the background with its own session, so the request
+    # doesn't wait on Kafka and its connection goes back to the pool now
+    workflow_service.schedule_job(source_id)
+    
+    return source_id
 
-@router.post("/transcribe-and-translate")
-async def transcribe_and_translate_general(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-):
-    """Endpoint to transcribe and translate a general URL"""
-    logger.info("/transcribe-and-translate called")
+def _make_transcribe_endpoint(route_path: str, spec: RouteSpec):
+    """Build the POST handler for a transcription route"""
+    async def endpoint(validation_result: Dict[str, Any] = Depends(route_parameters(route_path))):
+        logger.debug(f"{route_path} called")
+        
+        try:
+            source_id = await _create_job_and_start(
+                validation_result["workflow_name"],
+                spec,
+                validation_result["parameters"]
+            )
+            
+            return ORJSONResponse({"source_id": source_id})
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception(f"Unexpected error in {spec.name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=spec.error_detail)
     
+    return endpoint
+
+for route_path, spec in ROUTE_TABLE.items():
+    router.add_api_route(
+        route_path,
+        _make_transcribe_endpoint(route_path, spec),
+        methods=["POST"],
+        name=spec.name,
+        description=spec.description,
+    )
+
+async def _start_translation_and_release(db: AsyncSession, job: Dict[str, Any]):
+    """Start a translation workflow, then give the connection back to the pool"""
     try:
-        # Validate parameters against database configuration
-        validation_result = await validate_and_extract_parameters(
-            request, "/transcribe-and-translate", db
-        )
-        
-        params = validation_result["parameters"]
-        workflow_name = validation_result["workflow_name"]
-        
-        source_id = str(uuid.uuid4())
-        
-        # Create new job using validated parameters
-        job = TranscriptionAndTranslationJob(
-            source_id=source_id,
-            source_type=workflow_name,  # Use workflow name from database
-            url=str(params["url"]),
-            language=params.get("language"),
-            source_status=JobStatus.IN_PROGRESS
-        )
-        
-        db.add(job)
-        await db.commit()
-        
-        # Start workflow
-        await workflow_service.start_job(db, job)
-        
-        return {"source_id": source_id}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(f"Unexpected error in transcribe_and_translate_general: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal server error processing general transcription request"
-        )
+        await workflow_service.start_translation_job(db, job)
+    finally:
+        # The caller may wait up to 30s for the result; don't hold a connection for it
+        await db.close()
+
+def _fail_future_on_error(future: asyncio.Future):
+    """Build a done callback that fails the response future if starting the workflow failed"""
+    def callback(task: asyncio.Task):
+        if task.cancelled() or future.done():
+            return
+        error = task.exception()
+        if error is not None:
+            future.set_exception(error)
+    return callback
 
 @router.post("/translate")
 async def translate(
-    request: Request,
+    validation_result: Dict[str, Any] = Depends(route_parameters("/translate")),
     db: AsyncSession = Depends(get_db),
     wait_for_result: bool = Query(True, description="Wait for translation result or return immediately with source_id")
 ):
     """Endpoint to translate text directly"""
-    logger.info("/translate called")
+    logger.debug("/translate called")
     
     try:
-        # Validate parameters against database configuration
-        validation_result = await validate_and_extract_parameters(
-            request, "/translate", db
-        )
-        
         params = validation_result["parameters"]
         workflow_name = validation_result["workflow_name"]
         
@@ -221,16 +308,17 @@ async def translate(
                 detail="Missing required fields: source_language_id or input"
             )
         
+        # One (cached) lookup of the active languages serves every check below
+        languages = await language_service.get_languages_by_code(db)
+        
         # Validate source language
-        language = await language_service.get_language_by_code(db, source_language)
-        if not language:
+        if source_language not in languages:
             raise HTTPException(status_code=400, detail="Unsupported source language")
         
         # Handle optional target_language_ids
         if target_langs is None:
             # If no target languages specified, default to all supported languages
-            all_languages = await language_service.get_all_languages(db)
-            target_langs = [lang.code for lang in all_languages]
+            target_langs = list(languages)
             logger.info(f"No target languages specified, defaulting to all languages: {target_langs}")
         else:
             # Ensure target_langs is a list
@@ -238,40 +326,40 @@ async def translate(
                 target_langs = [target_langs]
             
             # Validate target languages
-            validation_results = await language_service.validate_language_codes(db, target_langs)
-            invalid_langs = [lang for lang, valid in validation_results.items() if not valid]
+            invalid_langs = [lang for lang in target_langs if lang not in languages]
             if invalid_langs:
                 raise HTTPException(status_code=400, detail=f"Unsupported target languages: {', '.join(invalid_langs)}")
         
         # Create a translation job
-        source_id = str(uuid.uuid4())
+        source_id = _new_source_id()
         logger.info(f"Created translation job with source_id: {source_id}")
         
-        job = TranslationJob(
-            source_id=source_id,
-            source_type=workflow_name,
-            source_language=source_language,
-            target_language_ids=target_langs,
-            input_text=input_text,
-            format=params.get("format", "text"),  # Default to "text" instead of None
-            status=JobStatus.IN_PROGRESS
-        )
+        job = {
+            "source_id": source_id,
+            "source_type": workflow_name,
+            "source_language": source_language,
+            "target_language_ids": target_langs,
+            "input_text": input_text,
+            "format": params.get("format", "text"),  # Default to "text" instead of None
+            "status": _IN_PROGRESS
+        }
         
-        db.add(job)
-        await db.commit()
+        # Write-only path: insert the row directly instead of going through an ORM object
+        await job_commit_queue.submit(TranslationJob, job)
         logger.info(f"Saved translation job to database: {source_id} with target languages: {target_langs}")
         
         # If wait_for_result is False, return immediately with source_id
         if not wait_for_result:
             await workflow_service.start_translation_job(db, job)
-            return {"source_id": source_id}
+            return ORJSONResponse({"source_id": source_id})
         
         # CRITICAL: Register the future BEFORE starting the workflow
         logger.info(f"Registering future for {source_id} BEFORE starting workflow")
         future = translation_response_handler.register_request(source_id)
         
-        # Now start the workflow
-        await workflow_service.start_translation_job(db, job)
+        # Now start the workflow, overlapping it with the wait below
+        start_task = asyncio.create_task(_start_translation_and_release(db, job))
+        start_task.add_done_callback(_fail_future_on_error(future))
         logger.info(f"Started translation workflow for {source_id}, now waiting for response")
         
         # Wait for the future to complete
@@ -283,11 +371,11 @@ async def translate(
             
             if result:
                 logger.info(f"Returning translations for {source_id}")
-                return {
+                return ORJSONResponse({
                     "source_id": source_id,
                     "translations": result.get("translations", {}),
                     "status": "completed"
-                }
+                })
             else:
                 logger.error(f"Empty result received for {source_id}")
                 return {
@@ -297,12 +385,12 @@ async def translate(
                 }
                 
         except asyncio.TimeoutError:
+            # wait_for cancelled the future; the handler's sweeper drops the entry
             logger.warning(f"Timeout waiting for response for {source_id}")
-            # Remove from pending requests if it exists
-            translation_response_handler._pending_requests.pop(source_id, None)
             
-            # Re-fetch job to get any partial results
-            await db.refresh(job)
+            # Re-fetch job to get any partial results, on a short-lived session
+            async with async_session() as session:
+                job = await session.get(TranslationJob, source_id)
             return {
                 "source_id": source_id,
                 "status": job.status.value,
@@ -325,30 +413,3 @@ async def translate(
             status_code=500,
             detail="Internal server error processing translation request"
         )
-
-@router.get("/transcribe-and-translate/{source_id}/status", response_model=JobStatusResponse)
-async def get_job_status(source_id: str, db: AsyncSession = Depends(get_db)):
-    """Get status of a transcription/translation job"""
-    try:
-        stmt = select(TranscriptionAndTranslationJob).where(TranscriptionAndTranslationJob.source_id == source_id)
-        result = await db.execute(stmt)
-        job = result.scalar_one_or_none()
-        
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-            
-        return {
-            "status": job.source_status,
-            "source_id": job.source_id,
-            "transcription": job.transcription,
-            "translations": job.translations
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(f"Unexpected error in get_job_status: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal server error retrieving job status"
-        )
\ No newline at end of file
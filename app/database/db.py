@@ -1,18 +1,40 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import orjson
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.config import settings
 from app.database.models import Base
 
+def dump_json(value) -> str:
+    """Serialize JSON column values with orjson; asyncpg expects text"""
+    return orjson.dumps(value).decode()
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
+    # Size the pool for concurrent POSTs instead of the default of 5
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    # Drop dead or stale connections before handing them out
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Compiled SQL is cached per engine, so every session reuses it
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    # JSON columns (translations, language lists) are encoded and decoded on every job
+    json_serializer=dump_json,
+    json_deserializer=orjson.loads,
+    # Server-side prepared statements kept per asyncpg connection
+    connect_args={
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        # The JIT only pays off for long analytic queries; for short lookups it adds latency
+        "server_settings": {"jit": "off"},
+    },
 )
 
 # Create async session factory
-async_session = sessionmaker(
+async_session = async_sessionmaker(
     engine, 
-    class_=AsyncSession, 
     expire_on_commit=False
 )
 
@@ -24,4 +46,14 @@ async def get_db():
 # Create tables
 async def create_tables():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+
+# Open the pool's connections up front so early requests don't pay for the handshake
+async def warm_up_pool() -> int:
+    connections = await asyncio.gather(
+        *(engine.connect() for _ in range(settings.DB_POOL_SIZE)),
+        return_exceptions=True
+    )
+    opened = [conn for conn in connections if not isinstance(conn, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in opened))
+    return len(opened)
\ No newline at end of file
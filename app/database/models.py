@@ -1,12 +1,17 @@
-from sqlalchemy import Column, String, Text, ARRAY, JSON, DateTime, Enum, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, Text, ARRAY, JSON, DateTime, Enum, ForeignKey, Index, Integer, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
+from datetime import datetime, timezone
 import enum
 
 Base = declarative_base()
 
+def _utcnow() -> datetime:
+    # Timestamps are set by the app, so inserts/updates never need the values read back
+    return datetime.now(timezone.utc)
+
 class SourceType(str, enum.Enum):
     PEERTUBE = "peertube"
     GENERAL = "general"
@@ -24,8 +29,8 @@ class Language(Base):
     name = Column(String, nullable=False)    # e.g., "English", "German"
     translation_target = Column(String, nullable=False)  # "deepl" or "google_translate"
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
 
 # New models for dynamic workflows
 class WorkflowConfiguration(Base):
@@ -35,11 +40,14 @@ class WorkflowConfiguration(Base):
     name = Column(String, unique=True, nullable=False)  # e.g., "peertube", "general", "translation_only"
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
     
     # Relationship to workflow steps
-    steps = relationship("WorkflowStep", back_populates="workflow", cascade="all, delete-orphan")
+    steps = relationship(
+        "WorkflowStep", back_populates="workflow", cascade="all, delete-orphan",
+        order_by="WorkflowStep.step_order"
+    )
 
 class WorkflowStep(Base):
     __tablename__ = "workflow_steps"
@@ -53,6 +61,11 @@ class WorkflowStep(Base):
     
     # Relationship back to workflow
     workflow = relationship("WorkflowConfiguration", back_populates="steps")
+    
+    # Loading a workflow's steps filters on workflow_id and orders by step_order
+    __table_args__ = (
+        Index("ix_workflow_steps_workflow_id_step_order", "workflow_id", "step_order"),
+    )
 
 class RouteConfiguration(Base):
     __tablename__ = "route_configurations"
@@ -64,15 +77,15 @@ class RouteConfiguration(Base):
     optional_parameters = Column(JSON, nullable=True)  # JSON schema for optional parameters
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
     
 # Add this to app/database/models.py
 
 class TranslationJob(Base):
     __tablename__ = "translation_jobs"
     
-    source_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    source_id = Column(String(36), primary_key=True, default=lambda: uuid.uuid4().hex)
     source_type = Column(String, nullable=False, default="translation")
     source_language = Column(String, nullable=False)
     target_language_ids = Column(ARRAY(String), nullable=False)
@@ -81,8 +94,8 @@ class TranslationJob(Base):
     translations = Column(JSON, nullable=True)  # {"es": "Hola", "fr": "Bonjour"}
     status = Column(Enum(JobStatus), default=JobStatus.IN_PROGRESS)
     workflow_step = Column(String, default="0")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
     
     def to_dict(self):
         return {
@@ -101,16 +114,20 @@ class TranslationJob(Base):
 class TranscriptionAndTranslationJob(Base):
     __tablename__ = "transcribe_and_translate"
     
-    source_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    source_id = Column(String(36), primary_key=True, default=lambda: uuid.uuid4().hex)
     source_type = Column(String, nullable=False)
     url = Column(String, nullable=False)
     video_id = Column(String, nullable=True)  # For PeerTube videos
     peertube_basedomain = Column(String, nullable=True)  # Added PeerTube base domain
     language = Column(String, nullable=True)  # Source language
-    source_status = Column(String, default=JobStatus.IN_PROGRESS)
+    # Stored as the enum's values in a VARCHAR, which matches the rows already written as strings
+    source_status = Column(
+        Enum(JobStatus, native_enum=False, length=16, values_callable=lambda x: [e.value for e in x]),
+        default=JobStatus.IN_PROGRESS
+    )
     workflow_step = Column(String, default="0")  # Track which step in workflow we're on
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=_utcnow)
     
     # JSON fields to store results
     transcription = Column(JSON, nullable=True)
@@ -1,6 +1,46 @@
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import List, Tuple, Union
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Queue handlers attached to the root logger and the listener threads doing
+# their actual I/O; both are removed again by stop_logging
+_installed: List[Tuple[QueueHandler, QueueListener]] = []
+
+def _add_queued_handler(handler: logging.Handler):
+    """Start a listener thread for handler and feed it from a queue handler on the root logger"""
+    # The event loop only enqueues records; the listener thread writes them out
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    
+    # Leave the real formatting to the handler on the listener side
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.getLogger().addHandler(queue_handler)
+    _installed.append((queue_handler, listener))
+
+def setup_console_logging(level: Union[int, str] = logging.INFO):
+    """Route root logging through a queue so callers never block on console I/O"""
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logging.getLogger().setLevel(level)
+    _add_queued_handler(console_handler)
+
+def stop_logging():
+    """Detach the queue handlers, then flush and stop their listeners"""
+    # Detach first so no record lands on a queue that is no longer drained
+    root_logger = logging.getLogger()
+    while _installed:
+        queue_handler, listener = _installed.pop()
+        root_logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
 def setup_file_logging():
     """Add file logging to existing console logging"""
@@ -13,11 +53,10 @@ def setup_file_logging():
     file_handler.setLevel(logging.DEBUG)
     
     # Use same format as console
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter(LOG_FORMAT)
     file_handler.setFormatter(formatter)
     
-    # Add to root logger
-    root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
+    # Add to root logger; writes happen on the listener thread, not the event loop
+    _add_queued_handler(file_handler)
     
-    logging.info(f"File logging enabled: {log_dir / 'app.log'}")
\ No newline at end of file
+    logging.info(f"File logging enabled: {log_dir / 'app.log'}")
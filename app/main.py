@@ -1,56 +1,46 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.router import router
-from app.database.db import create_tables, async_session
+from app.database.db import create_tables, async_session, warm_up_pool
 from app.services.kafka_service import kafka_service
 from app.services.workflow_service import workflow_service
-from app.logging_config import setup_file_logging
+from app.services.workflow_db_service import workflow_db_service
+from app.services.language_service import language_service
+from app.logging_config import setup_console_logging, setup_file_logging, stop_logging
 from app.config import settings
 from app.services.translation_response_handler import translation_response_handler
+from app.services.job_commit_queue import job_commit_queue
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
 logger = logging.getLogger(__name__)
 
-# Create FastAPI app
-app = FastAPI(
-    title="Transcription and Translation API",
-    description="API for transcribing and translating audio/video content",
-    version="1.0.0",
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include API router
-app.include_router(router)
-
 async def create_response_handler(topic: str):
     """Create a response handler for a specific topic"""
     async def handler(data: dict):
         await workflow_service.process_response(topic, data)
     return handler
 
-@app.on_event("startup")
 async def startup_event():
-    
+    """Start services and warm caches before the app serves requests"""
+    # Logging is set up here rather than at import, so stop_logging's teardown
+    # is undone again if the lifespan runs a second time in the same process
+    setup_console_logging(settings.LOG_LEVEL)
     setup_file_logging()
     
     # Create database tables
     await create_tables()
     logger.info("Database tables created")
     
+    # Fill the connection pool before traffic arrives
+    opened = await warm_up_pool()
+    logger.info(f"Warmed up {opened}/{settings.DB_POOL_SIZE} database connections")
+    
+    # Start the batched job insert worker
+    await job_commit_queue.start()
+    
     # Start Kafka producer
     await kafka_service.start_producer()
     
@@ -60,6 +50,15 @@ async def startup_event():
     
     # Load response topics from database workflows
     async with async_session() as session:
+        try:
+            # Warm the route, workflow and language caches so the first requests don't hit the database
+            await workflow_db_service.load_all(session)
+            await language_service.get_languages_by_code(session)
+        except Exception as e:
+            # The caches fill on first use instead; this must not keep the consumers below from starting
+            logger.error(f"Error preloading configs from database: {str(e)}")
+            await session.rollback()
+        
         try:
             response_topics = await workflow_service.get_response_topics(session)
             logger.info(f"Found response topics from database: {response_topics}")
@@ -77,15 +76,60 @@ async def startup_event():
     
     logger.info("Application started successfully")
 
-@app.on_event("shutdown")
 async def shutdown_event():
+    """Stop the background services and flush the logs"""
     # Stop translation response handler
     await translation_response_handler.stop()
+    # Commit any queued job inserts
+    await job_commit_queue.stop()
     # Stop Kafka consumers and producer
     await kafka_service.stop_all_consumers()
     await kafka_service.stop_producer()
     logger.info("Application shutdown complete")
+    stop_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup before the first request and shutdown after the last one"""
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
+# Create FastAPI app
+app = FastAPI(
+    title="Transcription and Translation API",
+    description="API for transcribing and translating audio/video content",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Include API router
+app.include_router(router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8080, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8080,
+        # Responses to /translate are consumed by whichever worker Kafka assigns,
+        # so only run several workers once consumers can reach every worker's futures
+        workers=settings.WORKERS,
+        reload=settings.RELOAD,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        log_level=settings.LOG_LEVEL.lower(),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import List, Optional, Union, Dict
 import uuid
 
@@ -18,6 +18,8 @@ class TranslateRequest(BaseModel):
     target_language_ids: Union[List[str], str]
 
 class JobStatusResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     status: str
     source_id: str
     transcription: Optional[Dict] = None
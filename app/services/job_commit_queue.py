@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from app.database.db import async_session
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobCommitQueue:
+    """Coalesces job inserts that arrive close together into one transaction"""
+
+    def __init__(self, batch_size: int = settings.JOB_COMMIT_BATCH_SIZE, max_delay: float = settings.JOB_COMMIT_MAX_DELAY):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task = None
+
+    async def start(self):
+        """Start the commit worker"""
+        self._queue = asyncio.Queue()
+        self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commit whatever is still queued, then stop the worker"""
+        if self._worker_task:
+            await self._queue.join()
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+
+    async def submit(self, model, values: Dict[str, Any]):
+        """Queue a row for insertion and wait until its transaction has committed"""
+        if self._worker_task is None:
+            raise RuntimeError("JobCommitQueue is not running; call start() first")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((model, values, future))
+        await future
+
+    async def _run(self):
+        """Drain up to batch_size rows, or whatever arrived within max_delay, per commit"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit_batch(self, batch: List[Tuple[Any, Dict[str, Any], asyncio.Future]]):
+        """Insert a batch in one transaction and resolve the submitters' futures"""
+        try:
+            await self._insert(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error committing job: {str(e)}")
+                self._resolve(batch, e)
+                return
+            # One bad row rolls back the whole transaction; retry each row on its
+            # own so only the submitter of the failing row gets the error
+            logger.warning(f"Error committing batch of {len(batch)} jobs, retrying one at a time: {str(e)}")
+            for item in batch:
+                await self._commit_batch([item])
+            return
+
+        logger.debug(f"Committed batch of {len(batch)} jobs")
+        self._resolve(batch)
+
+    async def _insert(self, batch: List[Tuple[Any, Dict[str, Any], asyncio.Future]]):
+        """Insert the batch's rows and commit them in one transaction"""
+        # executemany needs the same columns on every row, so group by table and keys
+        groups: Dict[Tuple[Any, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+        for model, values, _ in batch:
+            groups.setdefault((model, tuple(sorted(values))), []).append(values)
+
+        async with async_session() as session:
+            for (model, _), rows in groups.items():
+                await session.execute(insert(model), rows)
+            await session.commit()
+
+    def _resolve(self, batch: List[Tuple[Any, Dict[str, Any], asyncio.Future]], error: Optional[Exception] = None):
+        """Complete the submitters' futures, with error if the insert failed"""
+        for _, _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+# Create global instance
+job_commit_queue = JobCommitQueue()
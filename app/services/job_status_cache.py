@@ -0,0 +1,15 @@
+from app.config import settings
+from app.services.ttl_cache import TTLCache
+
+# Clients poll the status endpoint every second or two until their job is done.
+# Serving repeat polls from memory for a short TTL keeps most of them off Postgres;
+# finished jobs no longer change, so their responses are kept much longer.
+job_status_cache = TTLCache(
+    ttl=settings.STATUS_CACHE_TTL,
+    maxsize=settings.STATUS_CACHE_MAX_ENTRIES,
+)
+
+def invalidate_job_status(source_id: str):
+    """Drop every cached status response (full and status-only) for a job"""
+    job_status_cache.pop((source_id, True))
+    job_status_cache.pop((source_id, False))
\ No newline at end of file
@@ -1,71 +1,108 @@
-import json
+import orjson
 import asyncio
 import logging
 from typing import Dict, Any, Callable, Coroutine, Optional, List
 from confluent_kafka import Producer, Consumer, KafkaError
-from concurrent.futures import ThreadPoolExecutor
+import concurrent.futures
+import threading
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Batches a consumer thread may hand over before it waits for the handlers to catch up
+CONSUMER_QUEUE_BATCHES = 10
+
 class KafkaService:
     def __init__(self):
         self.producer = None
         self.consumers = {}
         self.handlers = {}
         self.consumer_tasks = {}
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # One dedicated thread per consumer runs the blocking consume() loop
+        self.consumer_threads = {}
         self._running = True
+        self._producer_poll_task = None
+        # Caps how many messages are handled at once across all topics, so a full
+        # batch doesn't queue up on the database pool behind HTTP requests
+        self._handler_slots = asyncio.Semaphore(settings.KAFKA_HANDLER_CONCURRENCY)
         
     async def start_producer(self):
         self.producer = Producer({
             'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
             'client.id': 'fastapi-producer',
-            'linger.ms': 10,
-            'batch.size': 16384
+            # Let librdkafka batch messages instead of sending one request per produce()
+            'linger.ms': settings.KAFKA_LINGER_MS,
+            'batch.size': settings.KAFKA_BATCH_SIZE,
+            # Payloads are mostly text, which compresses well per batch
+            'compression.type': settings.KAFKA_COMPRESSION_TYPE
         })
+        self._producer_poll_task = asyncio.create_task(self._poll_producer())
         logger.info("Kafka producer started")
         
     async def stop_producer(self):
+        if self._producer_poll_task:
+            self._producer_poll_task.cancel()
+            try:
+                await self._producer_poll_task
+            except asyncio.CancelledError:
+                pass
+            self._producer_poll_task = None
+            
         if self.producer:
             # Flush any remaining messages
             self.producer.flush()
             self.producer = None
             logger.info("Kafka producer stopped")
             
-    async def send_message(self, topic: str, message: Dict[str, Any], key: Optional[str] = None):
+    async def _poll_producer(self):
+        """Serve delivery callbacks in the background so produce() never has to wait"""
+        interval = settings.KAFKA_PRODUCER_POLL_INTERVAL
+        poll = self.producer.poll
+        while True:
+            await asyncio.sleep(interval)
+            poll(0)
+            
+    def _on_delivery(self, err, msg):
+        """Delivery report callback; only failures need attention"""
+        if err:
+            logger.error("Message delivery to %s failed: %s", msg.topic(), err)
+            
+    def _delivery_callback(self, on_error: Optional[Callable[[KafkaError], None]]):
+        """Delivery callback for one message that also reports its failure to on_error"""
+        if on_error is None:
+            return self._on_delivery
+        
+        def callback(err, msg):
+            self._on_delivery(err, msg)
+            if err:
+                # Runs inside producer.poll(); an exception here must not escape into librdkafka
+                try:
+                    on_error(err)
+                except Exception as e:
+                    logger.exception("Error handling failed delivery to %s: %s", msg.topic(), e)
+        return callback
+            
+    async def send_message(self, topic: str, message: Dict[str, Any], key: Optional[str] = None,
+                           on_error: Optional[Callable[[KafkaError], None]] = None):
+        """Queue a message for delivery; on_error is called from the event loop if delivery fails"""
         if not self.producer:
             await self.start_producer()
         
-        # Serialize message
-        value = json.dumps(message).encode('utf-8')
+        # Serialize message; orjson produces bytes directly
+        value = orjson.dumps(message)
         key_bytes = key.encode() if key else None
         
-        # Create a future for async handling
-        future = asyncio.Future()
-        
-        def delivery_callback(err, msg):
-            if err:
-                logger.error(f"Message delivery failed: {err}")
-                future.set_exception(Exception(f"Message delivery failed: {err}"))
-            else:
-                logger.debug(f"Message delivered to {msg.topic()} [{msg.partition()}]")
-                future.set_result(None)
-        
-        # Send message
-        self.producer.produce(
-            topic,
-            value=value,
-            key=key_bytes,
-            callback=delivery_callback
-        )
-        
-        # Trigger delivery callbacks
-        self.producer.poll(0)
+        # Hand the message to librdkafka and return; delivery is reported to the callback
+        callback = self._delivery_callback(on_error)
+        try:
+            self.producer.produce(topic, value=value, key=key_bytes, callback=callback)
+        except BufferError:
+            # Local queue is full: serve pending delivery reports to make room, then retry once
+            logger.warning("Kafka producer queue full, retrying message for topic %s", topic)
+            self.producer.poll(0)
+            self.producer.produce(topic, value=value, key=key_bytes, callback=callback)
         
-        # Wait for delivery
-        await future
-        logger.debug(f"Message sent to topic {topic}: {message}")
+        logger.debug("Message queued for topic %s: %s", topic, message)
     
     async def register_consumer(self, topic: str, 
                                handler: Callable[[Dict[str, Any]], Coroutine[Any, Any, None]],
@@ -76,7 +113,7 @@ class KafkaService:
     async def start_consumer(self, topic: str, group_id: Optional[str] = None):
         """Start a consumer for a topic"""
         if topic in self.consumers:
-            logger.warning(f"Consumer for topic {topic} already exists")
+            logger.warning("Consumer for topic %s already exists", topic)
             return
             
         consumer_config = {
@@ -86,69 +123,117 @@ class KafkaService:
             'enable.auto.commit': True,
             'auto.commit.interval.ms': 1000,
             'session.timeout.ms': 6000,
-            'max.poll.interval.ms': 300000
+            # Heartbeats well inside the session timeout so a busy consumer isn't kicked out
+            'heartbeat.interval.ms': 2000,
+            'max.poll.interval.ms': 300000,
+            # Fetch tuning: response topics are latency-sensitive, so by default the broker
+            # answers as soon as any data is there; raise the minimum to trade latency for batching
+            'fetch.min.bytes': settings.KAFKA_FETCH_MIN_BYTES,
+            'fetch.wait.max.ms': settings.KAFKA_FETCH_WAIT_MAX_MS,
+            # Stay under the broker's default idle timeout (10 min) so it never drops us first
+            'connections.max.idle.ms': 540000
         }
         
         consumer = Consumer(consumer_config)
         consumer.subscribe([topic])
         
         self.consumers[topic] = consumer
-        logger.info(f"Started consumer for topic {topic}")
+        
+        # The poll thread hands whole batches to the event loop through this queue;
+        # bounding it makes the thread wait when handlers fall behind
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue(maxsize=CONSUMER_QUEUE_BATCHES)
+        thread = threading.Thread(
+            target=self._poll_thread,
+            args=(topic, consumer, loop, batches),
+            name=f"kafka-consumer-{topic}",
+            daemon=True
+        )
+        thread.start()
+        self.consumer_threads[topic] = thread
+        logger.info("Started consumer for topic %s", topic)
         
         # Start the consumption task
-        task = asyncio.create_task(self._consume_messages(topic))
+        task = asyncio.create_task(self._consume_messages(topic, batches))
         self.consumer_tasks[topic] = task
         
-    async def _consume_messages(self, topic: str):
-        """Continuously consume messages from a topic"""
-        consumer = self.consumers.get(topic)
-        if not consumer:
-            logger.error(f"No consumer found for topic {topic}")
-            return
-            
+    def _poll_thread(self, topic: str, consumer: Consumer, loop: asyncio.AbstractEventLoop, batches: asyncio.Queue):
+        """Consume batches on this thread and pass them to the event loop until stopped"""
+        batch_size = settings.KAFKA_CONSUME_BATCH_SIZE
+        try:
+            while self._running:
+                messages = consumer.consume(num_messages=batch_size, timeout=1.0)
+                if not messages:
+                    continue
+                
+                put = asyncio.run_coroutine_threadsafe(batches.put(messages), loop)
+                while True:
+                    try:
+                        put.result(timeout=1.0)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        # Queue is full; keep waiting unless we're shutting down
+                        if not self._running:
+                            put.cancel()
+                            return
+        except Exception as e:
+            logger.exception("Error in consumer thread for topic %s: %s", topic, e)
+        finally:
+            # The consumer is only ever used from this thread, so close it here too
+            consumer.close()
+            logger.info("Consumer for topic %s closed", topic)
+        
+    async def _consume_messages(self, topic: str, batches: asyncio.Queue):
+        """Dispatch the batches handed over by a topic's poll thread"""
         handler = self.handlers.get(topic)
         if not handler:
-            logger.error(f"No handler registered for topic {topic}")
+            logger.error("No handler registered for topic %s", topic)
             return
         
-        loop = asyncio.get_event_loop()
-        
-        def poll_messages():
-            return consumer.poll(timeout=1.0)
+        # Bound once here; the loop below runs for every batch for the life of the app
+        partition_eof = KafkaError._PARTITION_EOF
+        loads = orjson.loads
+        handle_in_order = self._handle_in_order
         
         try:
-            while self._running:
-                # Poll for messages in thread pool to avoid blocking
-                msg = await loop.run_in_executor(self.executor, poll_messages)
+            while True:
+                messages = await batches.get()
                 
-                if msg is None:
-                    continue
+                # Messages with the same key (job) stay in order; different jobs run concurrently
+                by_key: Dict[Optional[bytes], List[Dict[str, Any]]] = {}
+                for msg in messages:
+                    error = msg.error()
+                    if error:
+                        if error.code() == partition_eof:
+                            logger.debug("Reached end of partition for topic %s", topic)
+                        else:
+                            logger.error("Consumer error: %s", error)
+                        continue
                     
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        logger.debug(f"Reached end of partition for topic {topic}")
-                    else:
-                        logger.error(f"Consumer error: {msg.error()}")
-                    continue
-                
-                try:
-                    # Deserialize message
-                    value = json.loads(msg.value().decode('utf-8'))
-                    logger.debug(f"Received message from {topic}: {value}")
+                    try:
+                        # Deserialize message
+                        value = loads(msg.value())
+                    except orjson.JSONDecodeError as e:
+                        logger.error("Failed to decode message: %s", e)
+                        continue
                     
-                    # Call handler
-                    await handler(value)
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to decode message: {e}")
-                except Exception as e:
-                    logger.exception(f"Error processing message: {e}")
+                    logger.debug("Received message from %s: %s", topic, value)
+                    by_key.setdefault(msg.key(), []).append(value)
+                
+                if by_key:
+                    await asyncio.gather(*(handle_in_order(handler, values) for values in by_key.values()))
                     
         except Exception as e:
-            logger.exception(f"Error in consumer loop: {e}")
-        finally:
-            consumer.close()
-            logger.info(f"Consumer for topic {topic} closed")
+            logger.exception("Error in consumer loop: %s", e)
+            
+    async def _handle_in_order(self, handler: Callable[[Dict[str, Any]], Coroutine[Any, Any, None]], values: List[Dict[str, Any]]):
+        """Run the handler for each message in turn, so one failure doesn't stop the rest"""
+        for value in values:
+            try:
+                async with self._handler_slots:
+                    await handler(value)
+            except Exception as e:
+                logger.exception("Error processing message: %s", e)
             
     async def stop_all_consumers(self):
         """Stop all consumers"""
@@ -161,18 +246,16 @@ class KafkaService:
                 await task
             except asyncio.CancelledError:
                 pass
-            logger.info(f"Stopped consumer task for topic {topic}")
+            logger.info("Stopped consumer task for topic %s", topic)
         
-        # Close all consumers
-        for topic, consumer in self.consumers.items():
-            consumer.close()
-            logger.info(f"Closed consumer for topic {topic}")
+        # Poll threads notice _running within a consume() timeout and close their consumers
+        for topic, thread in self.consumer_threads.items():
+            await asyncio.to_thread(thread.join)
+            logger.info("Closed consumer for topic %s", topic)
             
         self.consumers = {}
         self.consumer_tasks = {}
-        
-        # Shutdown executor
-        self.executor.shutdown(wait=True)
+        self.consumer_threads = {}
 
 # Create a global instance
 kafka_service = KafkaService()
\ No newline at end of file
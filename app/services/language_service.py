@@ -1,51 +1,79 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database.models import Language
+from app.services.ttl_cache import TTLCache
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 class LanguageService:
     def __init__(self):
-        self._language_cache = {}
-        self._translation_targets_cache = None
+        # Languages change on human timescales, so every lookup below is served
+        # from one cached snapshot of the active rows that is reloaded after the TTL
+        self._cache = TTLCache(ttl=settings.LANGUAGE_CACHE_TTL)
+        self._load_lock = asyncio.Lock()
+        
+    async def get_languages_by_code(self, session: AsyncSession) -> Mapping[str, Language]:
+        """Get all active languages keyed by code, ordered by code"""
+        languages = self._cache.get("languages")
+        if languages is not None:
+            return languages
+            
+        # Only one coroutine reloads; the others wait and reuse its snapshot
+        async with self._load_lock:
+            languages = self._cache.get("languages")
+            if languages is not None:
+                return languages
+                
+            stmt = select(Language).where(Language.is_active == True).order_by(Language.code)
+            result = await session.execute(stmt)
+            # Read-only, so callers can share the snapshot without copying it
+            languages = MappingProxyType({lang.code: lang for lang in result.scalars().all()})
+            
+            # The derived views are rebuilt from the fresh snapshot on next use
+            self._cache.clear()
+            self._cache.set("languages", languages)
+            logger.debug(f"Loaded {len(languages)} active languages from database")
+        
+        return languages
         
     async def get_all_languages(self, session: AsyncSession) -> List[Language]:
         """Get all active languages from database"""
-        stmt = select(Language).where(Language.is_active == True).order_by(Language.code)
-        result = await session.execute(stmt)
-        return result.scalars().all()
+        languages = await self.get_languages_by_code(session)
+        return list(languages.values())
     
     async def get_language_by_code(self, session: AsyncSession, code: str) -> Optional[Language]:
         """Get a specific language by code"""
-        # Check cache first
-        if code in self._language_cache:
-            return self._language_cache[code]
-            
-        language = await session.get(Language, code)
-        if language and language.is_active:
-            self._language_cache[code] = language
-            return language
-        return None
+        languages = await self.get_languages_by_code(session)
+        return languages.get(code)
     
     async def get_translation_targets(self, session: AsyncSession) -> Dict[str, str]:
         """Get translation targets for all languages"""
         # Check cache first
-        if self._translation_targets_cache:
-            return self._translation_targets_cache
+        targets = self._cache.get("translation_targets")
+        if targets is not None:
+            return targets
             
         languages = await self.get_all_languages(session)
         targets = {lang.code: lang.translation_target for lang in languages}
         
         # Cache the result
-        self._translation_targets_cache = targets
+        self._cache.set("translation_targets", targets)
         logger.debug(f"Loaded {len(targets)} translation targets from database")
         
         return targets
     
     async def get_supported_languages_format(self, session: AsyncSession) -> List[Dict]:
         """Get languages in the format expected by the frontend"""
+        # Check cache first
+        supported_languages = self._cache.get("supported_languages")
+        if supported_languages is not None:
+            return supported_languages
+            
         languages = await self.get_all_languages(session)
         
         # Get all language codes as targets
@@ -61,22 +89,19 @@ class LanguageService:
             for lang in languages
         ]
         
+        # Cache the result
+        self._cache.set("supported_languages", supported_languages)
+        
         return supported_languages
     
     async def validate_language_codes(self, session: AsyncSession, codes: List[str]) -> Dict[str, bool]:
         """Validate if language codes exist and are active"""
-        validation_results = {}
-        
-        for code in codes:
-            language = await self.get_language_by_code(session, code)
-            validation_results[code] = language is not None
-            
-        return validation_results
+        languages = await self.get_languages_by_code(session)
+        return {code: code in languages for code in codes}
     
     def clear_cache(self):
         """Clear the language cache"""
-        self._language_cache.clear()
-        self._translation_targets_cache = None
+        self._cache.clear()
         logger.info("Language cache cleared")
 
 # Create global instance
@@ -0,0 +1,118 @@
+from typing import Any, Callable, Dict, List
+import fastjsonschema
+from fastjsonschema import JsonSchemaValueException
+
+# Python checks for the JSON schema types used in route parameter configs.
+# bool is a subclass of int, so integers/numbers have to exclude it explicitly.
+_TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "array": "isinstance({v}, list)",
+    "object": "isinstance({v}, dict)",
+}
+
+# Keys the code generator understands; anything else goes through fastjsonschema
+_SUPPORTED_KEYS = {"type", "description", "enum"}
+_LITERAL_TYPES = (str, int, float, bool, type(None))
+
+def build_parameter_schema(required_params: Dict[str, Any], optional_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a route's required/optional parameter configs into a JSON schema"""
+    return {
+        "type": "object",
+        "properties": {**optional_params, **required_params},
+        "required": list(required_params)
+    }
+
+def compile_parameter_validator(required_params: Dict[str, Any], optional_params: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Compile a route's parameter configs into a validator function.
+
+    Flat configs (a type, an optional enum) are turned into straight-line Python
+    that checks each field directly. Anything the generator doesn't understand is
+    compiled with fastjsonschema instead. Both raise JsonSchemaValueException.
+    """
+    source = _generate_source(required_params, optional_params)
+    if source is None:
+        return fastjsonschema.compile(build_parameter_schema(required_params, optional_params))
+
+    namespace = {"JsonSchemaValueException": JsonSchemaValueException}
+    exec(compile(source, "<route parameter validator>", "exec"), namespace)
+    return namespace["validate"]
+
+def compile_permissive_validator(required_params: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Compile a validator that only checks the required parameters are present.
+
+    Used for route configs that don't compile, e.g. ones with a type JSON schema
+    doesn't know, which the old hand-written checks let through.
+    """
+    return compile_parameter_validator({name: {} for name in required_params}, {})
+
+def _generate_source(required_params: Dict[str, Any], optional_params: Dict[str, Any]):
+    """Emit validator source for flat parameter configs, or None if they aren't flat"""
+    lines = [
+        "def validate(data):",
+        "    if not isinstance(data, dict):",
+        "        raise JsonSchemaValueException('data must be object')",
+    ]
+
+    missing = list(required_params)
+    if missing:
+        # Mirror fastjsonschema's message for missing required properties
+        condition = " or ".join(f"{name!r} not in data" for name in missing)
+        lines += [
+            f"    if {condition}:",
+            f"        raise JsonSchemaValueException('data must contain ' + str(sorted(k for k in {missing!r} if k not in data)) + ' properties')",
+        ]
+
+    for name, config in {**optional_params, **required_params}.items():
+        checks = _field_checks(name, config)
+        if checks is None:
+            return None
+
+        for check, message in checks:
+            if name in required_params:
+                lines.append(f"    if not {check}:")
+            else:
+                lines.append(f"    if {name!r} in data and not {check}:")
+            lines.append(f"        raise JsonSchemaValueException({message!r})")
+
+    lines.append("    return data")
+    return "\n".join(lines)
+
+def _field_checks(name: Any, config: Any):
+    """Return (check, error message) pairs for one parameter, or None if it isn't flat"""
+    if not isinstance(name, str) or not isinstance(config, dict) or set(config) - _SUPPORTED_KEYS:
+        return None
+
+    value = f"data[{name!r}]"
+    checks: List = []
+    expected_type = config.get("type")
+    if expected_type is not None:
+        # A list of types (or anything else unusual) is left to fastjsonschema
+        if not isinstance(expected_type, str) or expected_type not in _TYPE_CHECKS:
+            return None
+        checks.append((_TYPE_CHECKS[expected_type].format(v=value), f"data.{name} must be {expected_type}"))
+
+    if "enum" in config:
+        enum = config["enum"]
+        if not isinstance(enum, list) or not all(isinstance(item, _LITERAL_TYPES) for item in enum):
+            return None
+        checks.append((_enum_check(value, enum), f"data.{name} must be one of {enum!r}"))
+
+    return checks
+
+def _enum_check(value: str, enum: List[Any]) -> str:
+    """Emit an enum membership check that compares type as well as value.
+
+    A plain `in` treats True as 1 and False as 0; JSON schema doesn't. Numbers
+    still compare by value, so 1 matches 1.0.
+    """
+    strings = tuple(item for item in enum if isinstance(item, str))
+    numbers = tuple(item for item in enum if isinstance(item, (int, float)) and not isinstance(item, bool))
+    conditions = [f"{value} is {item!r}" for item in (True, False, None) if any(other is item for other in enum)]
+    if strings:
+        conditions.append(f"(isinstance({value}, str) and {value} in {strings!r})")
+    if numbers:
+        conditions.append(f"({_TYPE_CHECKS['number'].format(v=value)} and {value} in {numbers!r})")
+    return f"({' or '.join(conditions) or 'False'})"
@@ -1,20 +1,40 @@
 import asyncio
+import functools
+import heapq
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Default seconds a registered request may stay pending before the sweeper drops it
+PENDING_REQUEST_TTL = 60.0
+
 class TranslationResponseHandler:
     """Handles async responses for translation requests"""
     
-    def __init__(self):
-        self._pending_requests: Dict[str, asyncio.Future] = {}
+    def __init__(self, default_ttl: float = PENDING_REQUEST_TTL):
+        self.default_ttl = default_ttl
+        # source_id -> (monotonic expiry, future)
+        self._pending_requests: Dict[str, Tuple[float, asyncio.Future]] = {}
+        # Min-heap of (expiry, source_id) so the sweeper only wakes when something expires
+        self._deadlines: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
         self._cleanup_task = None
+        # Strong references to background tasks so they aren't garbage collected mid-run
+        self._background_tasks = set()
         
     async def start(self):
         """Start the cleanup task"""
         self._cleanup_task = asyncio.create_task(self._cleanup_expired_futures())
+        self._background_tasks.add(self._cleanup_task)
+        self._cleanup_task.add_done_callback(self._on_background_task_done)
+        
+    def _on_background_task_done(self, task: asyncio.Task):
+        """Release a finished background task and surface its failure, if any"""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task failed: %s", task.exception())
         
     async def stop(self):
         """Stop the cleanup task"""
@@ -24,67 +44,112 @@ class TranslationResponseHandler:
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
+            self._cleanup_task = None
     
-    def register_request(self, source_id: str) -> asyncio.Future:
-        """Register a new request and return a future for its response"""
+    def register_request(self, source_id: str, ttl: Optional[float] = None) -> asyncio.Future:
+        """Register a new request and return a future for its response, kept for at most ttl seconds"""
         future = asyncio.Future()
-        self._pending_requests[source_id] = future
-        logger.info(f"Registered future for {source_id}. Total pending: {len(self._pending_requests)}")
-        logger.info(f"Current pending requests: {list(self._pending_requests.keys())}")
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._pending_requests[source_id] = (expires_at, future)
+        # Cancelled or abandoned futures free their entry right away instead of at the deadline
+        future.add_done_callback(functools.partial(self._on_future_done, source_id))
+        heapq.heappush(self._deadlines, (expires_at, source_id))
+        if self._deadlines[0][0] == expires_at:
+            # New earliest deadline; let the sweeper re-arm its sleep
+            self._wakeup.set()
+        logger.debug("Registered future for %s. Total pending: %s", source_id, len(self._pending_requests))
+        if logger.isEnabledFor(logging.DEBUG):
+            # Listing every pending id is O(n), so only do it when it is actually logged
+            logger.debug("Current pending requests: %s", list(self._pending_requests))
         return future
     
+    def _on_future_done(self, source_id: str, future: asyncio.Future):
+        """Drop a finished future's entry, unless the source_id was registered again since"""
+        pending = self._pending_requests.get(source_id)
+        if pending is not None and pending[1] is future:
+            del self._pending_requests[source_id]
+    
     async def handle_response(self, source_id: str, response_data: Dict[str, Any]):
         """Handle a response from Kafka and complete the future"""
-        logger.info(f"Handling response for {source_id}: {response_data}")
-        logger.info(f"Current pending requests: {list(self._pending_requests.keys())}")
+        logger.debug("Handling response for %s: %s", source_id, response_data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Current pending requests: %s", list(self._pending_requests))
         
-        future = self._pending_requests.pop(source_id, None)
+        pending = self._pending_requests.pop(source_id, None)
+        future = pending[1] if pending else None
         if future and not future.done():
             future.set_result(response_data)
-            logger.info(f"Successfully completed future for {source_id}")
+            logger.debug("Successfully completed future for %s", source_id)
         else:
             if future is None:
-                logger.error(f"No pending future found for {source_id}. Available: {list(self._pending_requests.keys())}")
+                logger.error("No pending future found for %s. Total pending: %s", source_id, len(self._pending_requests))
             elif future.done():
-                logger.warning(f"Future for {source_id} was already completed")
+                logger.warning("Future for %s was already completed", source_id)
+    
+    def fail_request(self, source_id: str, error: Exception):
+        """Fail a pending request's future, e.g. when its message could not be delivered"""
+        pending = self._pending_requests.pop(source_id, None)
+        if pending is not None and not pending[1].done():
+            pending[1].set_exception(error)
+            logger.debug("Failed future for %s: %s", source_id, error)
     
     async def wait_for_response(self, source_id: str, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
         """Wait for a response with timeout"""
         # This method shouldn't be used anymore - register_request should be called separately
-        logger.warning(f"wait_for_response called for {source_id} - this method is deprecated")
+        logger.warning("wait_for_response called for %s - this method is deprecated", source_id)
         future = self.register_request(source_id)
         try:
             result = await asyncio.wait_for(future, timeout=timeout)
             return result
         except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for response for {source_id}")
-            self._pending_requests.pop(source_id, None)
+            # wait_for cancelled the future, whose done callback dropped the entry
+            logger.warning("Timeout waiting for response for %s", source_id)
             return None
         except Exception as e:
-            logger.error(f"Error waiting for response for {source_id}: {e}")
-            self._pending_requests.pop(source_id, None)
+            logger.error("Error waiting for response for %s: %s", source_id, e)
+            future.cancel()
             raise
     
     async def _cleanup_expired_futures(self):
-        """Periodically clean up abandoned futures"""
+        """Sleep until the earliest deadline, then cancel and drop the requests that expired"""
         while True:
             try:
-                await asyncio.sleep(60)  # Run every minute
-                expired = []
-                for source_id, future in self._pending_requests.items():
-                    if future.done():
-                        expired.append(source_id)
-                        
-                for source_id in expired:
-                    self._pending_requests.pop(source_id, None)
+                if not self._deadlines:
+                    # Nothing pending: sleep until register_request wakes us
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                
+                delay = self._deadlines[0][0] - time.monotonic()
+                if delay > 0:
+                    # Woken early if a request with an earlier deadline is registered
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                now = time.monotonic()
+                expired = 0
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    deadline, source_id = heapq.heappop(self._deadlines)
+                    # Lazy deletion: answered requests were already popped from the dict,
+                    # and a re-registered source_id carries a newer deadline
+                    pending = self._pending_requests.get(source_id)
+                    if pending is None or pending[0] != deadline:
+                        continue
+                    del self._pending_requests[source_id]
+                    pending[1].cancel()
+                    expired += 1
                     
                 if expired:
-                    logger.info(f"Cleaned up {len(expired)} expired futures")
+                    logger.info("Cleaned up %s expired futures", expired)
                     
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in cleanup task: {e}")
+                logger.error("Error in cleanup task: %s", e)
 
 # Global instance
 translation_response_handler = TranslationResponseHandler()
\ No newline at end of file
@@ -0,0 +1,44 @@
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """Small in-process cache whose entries expire a fixed number of seconds after being set"""
+
+    def __init__(self, ttl: float, maxsize: Optional[int] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value, or default if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Drop stale entries lazily so the next lookup goes back to the source
+            self._entries.pop(key, None)
+            return default
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Cache a value for the configured TTL, or for ttl seconds if given"""
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+        # Entries are kept in insertion order, so the first one is the oldest
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            del self._entries[next(iter(self._entries))]
+
+    def pop(self, key: Hashable):
+        """Drop a single entry, e.g. when the underlying data changed"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached entry"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
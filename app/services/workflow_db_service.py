@@ -1,149 +1,157 @@
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Any
+import fastjsonschema
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import selectinload
 from app.database.models import WorkflowConfiguration, WorkflowStep, RouteConfiguration
+from app.services.ttl_cache import TTLCache
+from app.services.parameter_validation import compile_parameter_validator, compile_permissive_validator
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Lookups are built once so SQLAlchemy only has to bind the parameters per call
+_ACTIVE_WORKFLOWS_STMT = select(WorkflowConfiguration).options(
+    selectinload(WorkflowConfiguration.steps)
+).where(WorkflowConfiguration.is_active == True)
+_WORKFLOW_STMT = _ACTIVE_WORKFLOWS_STMT.where(WorkflowConfiguration.name == bindparam("name"))
+_ACTIVE_ROUTES_STMT = select(RouteConfiguration).where(RouteConfiguration.is_active == True)
+_ROUTE_STMT = _ACTIVE_ROUTES_STMT.where(RouteConfiguration.route_path == bindparam("route_path"))
+
+class Step(NamedTuple):
+    """One cached workflow step"""
+    topic: str
+    response_topic: str
+
 class WorkflowDatabaseService:
     def __init__(self):
-        self._workflow_cache = {}
-        self._route_cache = {}
+        # Configs are read on every POST and Kafka response, so keep them in memory
+        # but bounded, and let them expire so database edits are picked up without a restart
+        self._workflow_cache = TTLCache(
+            ttl=settings.WORKFLOW_CONFIG_CACHE_TTL,
+            maxsize=settings.CONFIG_CACHE_MAX_ENTRIES
+        )
+        # route_path -> (route config, its compiled parameter validator)
+        self._route_cache = TTLCache(
+            ttl=settings.ROUTE_CONFIG_CACHE_TTL,
+            maxsize=settings.CONFIG_CACHE_MAX_ENTRIES
+        )
+        # Response topics of the active workflows, computed by load_all
+        self._response_topics: Optional[List[str]] = None
         
     async def get_workflow_config(self, session: AsyncSession, workflow_name: str) -> Optional[Dict]:
         """Get workflow configuration from database"""
         # Check cache first
-        if workflow_name in self._workflow_cache:
-            return self._workflow_cache[workflow_name]
+        cached = self._workflow_cache.get(workflow_name)
+        if cached is not None:
+            return cached
             
         # Query database
-        stmt = select(WorkflowConfiguration).options(
-            selectinload(WorkflowConfiguration.steps)
-        ).where(
-            WorkflowConfiguration.name == workflow_name,
-            WorkflowConfiguration.is_active == True
-        )
-        
-        result = await session.execute(stmt)
+        result = await session.execute(_WORKFLOW_STMT, {"name": workflow_name})
         workflow = result.scalar_one_or_none()
         
         if not workflow:
             logger.error(f"No active workflow found with name: {workflow_name}")
             return None
             
-        # Convert to the format expected by workflow_service
-        workflow_config = {
-            "steps": []
-        }
-        
-        # Sort steps by step_order
-        sorted_steps = sorted(workflow.steps, key=lambda s: s.step_order)
-        
-        for step in sorted_steps:
-            workflow_config["steps"].append({
-                "topic": step.topic,
-                "response_topic": step.response_topic
-            })
-        
-        # Cache the result
-        self._workflow_cache[workflow_name] = workflow_config
+        workflow_config = self._cache_workflow(workflow)
         logger.info(f"Loaded workflow '{workflow_name}' with {len(workflow_config['steps'])} steps")
         
         return workflow_config
     
     async def get_route_config(self, session: AsyncSession, route_path: str) -> Optional[RouteConfiguration]:
         """Get route configuration from database"""
+        route = await self._get_route(session, route_path)
+        return route[0] if route else None
+    
+    async def _get_route(self, session: AsyncSession, route_path: str) -> Optional[Tuple[RouteConfiguration, Callable[[Any], Any]]]:
+        """Get a route configuration together with its compiled validator"""
         # Check cache first
-        cache_key = route_path
-        if cache_key in self._route_cache:
-            return self._route_cache[cache_key]
+        cached = self._route_cache.get(route_path)
+        if cached is not None:
+            return cached
             
         # Query database
-        stmt = select(RouteConfiguration).where(
-            RouteConfiguration.route_path == route_path,
-            RouteConfiguration.is_active == True
-        )
-        
-        result = await session.execute(stmt)
+        result = await session.execute(_ROUTE_STMT, {"route_path": route_path})
         route_config = result.scalar_one_or_none()
         
-        if route_config:
-            # Cache the result
-            self._route_cache[cache_key] = route_config
-            logger.debug(f"Loaded route config for: {route_path}")
-        else:
+        if not route_config:
             logger.warning(f"No active route configuration found for: {route_path}")
+            return None
             
-        return route_config
+        logger.debug(f"Loaded route config for: {route_path}")
+        return self._cache_route(route_config)
+    
+    async def load_all(self, session: AsyncSession):
+        """Load every active route and workflow configuration into the caches"""
+        result = await session.execute(_ACTIVE_ROUTES_STMT)
+        routes = result.scalars().all()
+        for route_config in routes:
+            self._cache_route(route_config)
+        
+        result = await session.execute(_ACTIVE_WORKFLOWS_STMT)
+        workflows = result.scalars().all()
+        for workflow in workflows:
+            self._cache_workflow(workflow)
+        self._response_topics = sorted({step.response_topic for workflow in workflows for step in workflow.steps})
+        
+        logger.info(f"Preloaded {len(routes)} route configs and {len(workflows)} workflows")
+    
+    def _cache_route(self, route_config: RouteConfiguration) -> Tuple[RouteConfiguration, Callable[[Any], Any]]:
+        """Compile a route's parameter configs once and cache them with the route"""
+        required_params = route_config.required_parameters or {}
+        try:
+            validator = compile_parameter_validator(required_params, route_config.optional_parameters or {})
+        except Exception as e:
+            # One bad config must not take the other routes (or startup) down with it
+            logger.error(f"Invalid parameter schema for route {route_config.route_path}, only checking required parameters: {str(e)}")
+            validator = compile_permissive_validator(required_params)
+        route = (route_config, validator)
+        self._route_cache.set(route_config.route_path, route)
+        return route
+    
+    def _cache_workflow(self, workflow: WorkflowConfiguration) -> Dict:
+        """Convert a workflow to the format expected by workflow_service and cache it"""
+        # The steps relationship is already ordered by step_order in SQL,
+        # and they are only ever read, so keep them as a tuple of tuples
+        workflow_config = {
+            "steps": tuple(Step(step.topic, step.response_topic) for step in workflow.steps)
+        }
+        
+        self._workflow_cache.set(workflow.name, workflow_config)
+        return workflow_config
     
     async def validate_route_parameters(self, session: AsyncSession, route_path: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Validate parameters against route configuration"""
-        route_config = await self.get_route_config(session, route_path)
+        route = await self._get_route(session, route_path)
         
-        if not route_config:
+        if not route:
             return {
                 "valid": False, 
                 "error": f"No configuration found for route: {route_path}"
             }
         
-        # Get parameter schemas
-        required_params = route_config.required_parameters or {}
-        optional_params = route_config.optional_parameters or {}
-        
-        # Check required parameters
-        missing_params = []
-        for param_name, param_config in required_params.items():
-            if param_name not in parameters:
-                missing_params.append(param_name)
-            else:
-                # Basic type validation
-                expected_type = param_config.get("type")
-                if expected_type and not self._validate_type(parameters[param_name], expected_type):
-                    return {
-                        "valid": False,
-                        "error": f"Parameter '{param_name}' should be of type {expected_type}"
-                    }
-        
-        if missing_params:
+        route_config, validator = route
+        try:
+            validator(parameters)
+        except fastjsonschema.JsonSchemaException as e:
             return {
                 "valid": False,
-                "error": f"Missing required parameters: {', '.join(missing_params)}"
+                "error": e.message
             }
         
-        # Validate optional parameters if present
-        for param_name, param_value in parameters.items():
-            if param_name in optional_params:
-                expected_type = optional_params[param_name].get("type")
-                if expected_type and not self._validate_type(param_value, expected_type):
-                    return {
-                        "valid": False,
-                        "error": f"Optional parameter '{param_name}' should be of type {expected_type}"
-                    }
-        
         return {
             "valid": True,
             "workflow_name": route_config.workflow_name
         }
     
-    def _validate_type(self, value: Any, expected_type: str) -> bool:
-        """Basic type validation"""
-        type_map = {
-            "string": str,
-            "integer": int,
-            "boolean": bool,
-            "array": list,
-            "object": dict
-        }
-        
-        if expected_type in type_map:
-            return isinstance(value, type_map[expected_type])
-        
-        return True  # Unknown type, assume valid
-    
     async def get_all_response_topics(self, session: AsyncSession) -> List[str]:
         """Get all response topics from active workflows"""
+        # The topics are already known if the workflows were preloaded
+        if self._response_topics is not None:
+            return list(self._response_topics)
+        
         stmt = select(WorkflowStep.response_topic).join(
             WorkflowConfiguration
         ).where(
@@ -151,7 +159,7 @@ class WorkflowDatabaseService:
         ).distinct()
         
         result = await session.execute(stmt)
-        topics = [row[0] for row in result.fetchall()]
+        topics = list(result.scalars())
         
         logger.info(f"Found {len(topics)} unique response topics from active workflows")
         return topics
@@ -160,6 +168,7 @@ class WorkflowDatabaseService:
         """Clear the internal cache - useful when workflows are updated"""
         self._workflow_cache.clear()
         self._route_cache.clear()
+        self._response_topics = None
         logger.info("Workflow and route cache cleared")
 
 # Create global instance
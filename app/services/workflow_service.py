@@ -1,37 +1,139 @@
 import logging
+from functools import lru_cache, partial
+from typing import Any, Dict, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from confluent_kafka import KafkaError, KafkaException
+from sqlalchemy import select, update, bindparam, cast, Integer, String
 from app.database.models import TranscriptionAndTranslationJob, TranslationJob, JobStatus
 from app.services.kafka_service import kafka_service
 from app.services.workflow_db_service import workflow_db_service
 from app.database.db import async_session
 from app.services.translation_response_handler import translation_response_handler
+from app.services.job_status_cache import invalidate_job_status
 
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Postgres hands the workflow step (a string column) back as an integer, so no int() per response
+_WORKFLOW_STEP_NUMBER = cast(TranscriptionAndTranslationJob.workflow_step, Integer).label("step")
+
+# Built once so SQLAlchemy only has to bind the parameters per call. Bind names in
+# UPDATE statements must not match a column name, hence job_source_id and new_*
+
+# A translation job's final status is written and its translations read back in one statement
+_TRANSLATION_RESPONSE_STMT = (
+    update(TranslationJob)
+    .where(TranslationJob.source_id == bindparam("job_source_id"))
+    .values(status=bindparam("new_status", type_=TranslationJob.status.type))
+    .returning(TranslationJob.translations)
+    .execution_options(synchronize_session=False)
+)
+
+@lru_cache(maxsize=None)
+def _transcription_response_statement(columns: Tuple[str, ...]):
+    """Build the statement that stores a response's results, once per set of result columns"""
+    if not columns:
+        # Nothing to store; just read which workflow step the job is on
+        return select(TranscriptionAndTranslationJob.source_type, _WORKFLOW_STEP_NUMBER).where(
+            TranscriptionAndTranslationJob.source_id == bindparam("job_source_id")
+        )
+    
+    job_columns = TranscriptionAndTranslationJob.__table__.c
+    return (
+        update(TranscriptionAndTranslationJob)
+        .where(TranscriptionAndTranslationJob.source_id == bindparam("job_source_id"))
+        .values({column: bindparam(f"new_{column}", type_=job_columns[column].type) for column in columns})
+        .returning(TranscriptionAndTranslationJob.source_type, _WORKFLOW_STEP_NUMBER)
+        .execution_options(synchronize_session=False)
+    )
+
+_SET_WORKFLOW_STEP_STMT = (
+    update(TranscriptionAndTranslationJob)
+    .where(TranscriptionAndTranslationJob.source_id == bindparam("job_source_id"))
+    .values(workflow_step=bindparam("new_workflow_step", type_=String))
+    .execution_options(synchronize_session=False)
+)
+
+_SET_JOB_STATUS_STMT = (
+    update(TranscriptionAndTranslationJob)
+    .where(TranscriptionAndTranslationJob.source_id == bindparam("job_source_id"))
+    .values(source_status=bindparam("new_status", type_=TranscriptionAndTranslationJob.source_status.type))
+    .execution_options(synchronize_session=False)
+)
+
+_SET_TRANSLATION_STATUS_STMT = (
+    update(TranslationJob)
+    .where(TranslationJob.source_id == bindparam("job_source_id"))
+    .values(status=bindparam("new_status", type_=TranslationJob.status.type))
+    .execution_options(synchronize_session=False)
+)
+
 class WorkflowService:
     def __init__(self):
         # Remove the static workflows - now loaded from database
-        pass
+        # Strong references to fire-and-forget tasks so they aren't garbage collected mid-run
+        self._background_tasks = set()
+        
+    def _run_in_background(self, coro) -> asyncio.Task:
+        """Run a coroutine as a task, holding a strong reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return task
+        
+    def _on_background_task_done(self, task: asyncio.Task):
+        """Release a finished background task and surface its failure, if any"""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task failed: %s", task.exception())
+        
+    def schedule_job(self, source_id: str) -> asyncio.Task:
+        """Start a job's workflow in the background so the request can return immediately"""
+        return self._run_in_background(self.start_job_by_id(source_id))
+        
+    async def start_job_by_id(self, source_id: str):
+        """Load a job in its own short-lived session and start its workflow"""
+        try:
+            async with async_session() as session:
+                job = await session.get(TranscriptionAndTranslationJob, source_id)
+                if not job:
+                    logger.error("Job not found for source_id: %s", source_id)
+                    return
+                await self.start_job(session, job)
+        except Exception as e:
+            logger.exception("Error starting job %s: %s", source_id, e)
+            # Nobody awaits this task, so record the failure where status polls can see it
+            try:
+                await self._fail_job(source_id)
+            except Exception as e:
+                logger.exception("Could not mark job %s as failed: %s", source_id, e)
+    
+    async def _fail_job(self, source_id: str):
+        """Mark a transcription job as failed in its own short-lived session"""
+        async with async_session() as session:
+            await self._set_job_status(session, source_id, JobStatus.ERROR)
+        # Make the next status poll see the error
+        invalidate_job_status(source_id)
         
     async def start_job(self, session: AsyncSession, job: TranscriptionAndTranslationJob):
         """Start a job by sending it to the first step in its workflow"""
         workflow = await workflow_db_service.get_workflow_config(session, job.source_type)
         if not workflow:
-            logger.error(f"No workflow found for source_type: {job.source_type}")
+            logger.error("No workflow found for source_type: %s", job.source_type)
             job.source_status = JobStatus.ERROR
             await session.commit()
+            invalidate_job_status(job.source_id)
             return
             
         # Send to first step
-        await self._send_to_step(job, 0, workflow)
-        logger.info(f"Started job {job.source_id} with workflow '{job.source_type}'")
+        await self._send_to_step(job.source_id, job.source_type, 0, workflow)
+        logger.info("Started job %s with workflow '%s'", job.source_id, job.source_type)
     
     async def process_response(self, topic: str, data: dict):
         """Process a response from any topic and advance the workflow"""
-        logger.info(f"Processing response from topic '{topic}': {data}")
+        # Responses can carry whole transcripts, so the payload is only logged at DEBUG
+        logger.debug("Processing response from topic '%s': %s", topic, data)
         
         source_id = data.get("source_id")
         if not source_id:
@@ -39,154 +141,180 @@ class WorkflowService:
             return
             
         async with async_session() as session:
-            # First try to find a translation job
-            stmt = select(TranslationJob).where(TranslationJob.source_id == source_id)
-            result = await session.execute(stmt)
-            translation_job = result.scalar_one_or_none()
+            # First try to find a translation job. The status is written and the
+            # translations (stored by the translation service) read back in one statement.
+            # Source ids are unique across both job tables, so a hit ends the lookup
+            succeeded = bool(data.get("success")) and data.get("type") == "translations"
+            result = await session.execute(_TRANSLATION_RESPONSE_STMT, {
+                "job_source_id": source_id,
+                "new_status": JobStatus.DONE if succeeded else JobStatus.ERROR
+            })
+            translation_row = result.first()
             
-            if translation_job:
-                # Handle translation job
-                logger.info(f"Found translation job for {source_id}")
-                
-                # Check if the response indicates success
-                if data.get("success") and data.get("type") == "translations":
-                    logger.info(f"Translation service confirmed completion for {source_id}, fetching results from database")
-                    
-                    # Refresh the job from database to get the latest data (including translations)
-                    await session.refresh(translation_job)
-                    
-                    # Check if translations were actually stored in the database
-                    if translation_job.translations:
-                        translation_job.status = JobStatus.DONE
-                        await session.commit()
-                        
-                        # Send response back to waiting HTTP request
-                        response_data = {
-                            "source_id": source_id,
-                            "translations": translation_job.translations,
-                            "status": "completed"
-                        }
-                        
-                        await translation_response_handler.handle_response(source_id, response_data)
-                        logger.info(f"Translation job {source_id} completed with translations: {translation_job.translations}")
-                        return
-                    else:
-                        logger.error(f"Translation service confirmed success but no translations found in database for {source_id}")
-                        translation_job.status = JobStatus.ERROR
-                        await session.commit()
-                        
-                        # Send error response
-                        await translation_response_handler.handle_response(source_id, {
-                            "source_id": source_id,
-                            "error": "Translation completed but no results found in database",
-                            "status": "error"
-                        })
-                        return
-                else:
-                    # Translation failed
-                    logger.error(f"Translation service reported failure for {source_id}: {data}")
-                    translation_job.status = JobStatus.ERROR
-                    await session.commit()
-                    
-                    # Send error response
-                    await translation_response_handler.handle_response(source_id, {
-                        "source_id": source_id,
-                        "error": f"Translation service error: {data.get('message', 'Unknown error')}",
-                        "status": "error"
-                    })
-                    return
+            if translation_row is not None:
+                await self._finish_translation_job(session, source_id, data, succeeded, translation_row.translations)
+                return
             
-            # If not a translation job, check transcription job
-            stmt = select(TranscriptionAndTranslationJob).where(TranscriptionAndTranslationJob.source_id == source_id)
-            result = await session.execute(stmt)
-            job = result.scalar_one_or_none()
+            # If not a translation job, it's a transcription job: store the step's
+            # results and read back where the job is in its workflow
+            fields = self._response_fields(data)
+            params = {f"new_{column}": value for column, value in fields.items()}
+            params["job_source_id"] = source_id
+            result = await session.execute(_transcription_response_statement(tuple(fields)), params)
+            job_row = result.first()
             
-            if not job:
-                logger.error(f"Job not found for source_id: {source_id}")
+            if job_row is None:
+                logger.error("Job not found for source_id: %s", source_id)
                 return
             
-            # Handle transcription job as before
-            await self._update_job_with_response(job, data)
+            if fields:
+                logger.info("Updated %s for job %s", ", ".join(fields), source_id)
+            await self._advance_workflow(session, source_id, job_row.source_type, job_row.step + 1)
+            
+            # Make the next status poll see the new results
+            invalidate_job_status(source_id)
+
+    async def _finish_translation_job(self, session: AsyncSession, source_id: str, data: dict, succeeded: bool, translations):
+        """Commit a translation job's final status and answer the waiting HTTP request"""
+        if not succeeded:
+            # Translation failed
+            await session.commit()
+            logger.error("Translation service reported failure for %s: %s", source_id, data)
+            await translation_response_handler.handle_response(source_id, {
+                "source_id": source_id,
+                "error": f"Translation service error: {data.get('message', 'Unknown error')}",
+                "status": "error"
+            })
+            return
+        
+        logger.info("Translation service confirmed completion for %s", source_id)
+        
+        # Check if translations were actually stored in the database
+        if not translations:
+            logger.error("Translation service confirmed success but no translations found in database for %s", source_id)
+            await session.execute(_SET_TRANSLATION_STATUS_STMT, {"job_source_id": source_id, "new_status": JobStatus.ERROR})
             await session.commit()
-            await self._advance_workflow(session, job)
+            
+            # Send error response
+            await translation_response_handler.handle_response(source_id, {
+                "source_id": source_id,
+                "error": "Translation completed but no results found in database",
+                "status": "error"
+            })
+            return
+        
+        await session.commit()
+        
+        # Send response back to waiting HTTP request
+        await translation_response_handler.handle_response(source_id, {
+            "source_id": source_id,
+            "translations": translations,
+            "status": "completed"
+        })
+        logger.info("Translation job %s completed with %s translations", source_id, len(translations))
 
-    async def start_translation_job(self, session: AsyncSession, job: TranslationJob):
-        """Start a translation-only job"""
+    async def start_translation_job(self, session: AsyncSession, job: Dict[str, Any]):
+        """Start a translation-only job from the column values it was inserted with"""
         # Send to translation service
         message = {
-            "source_id": job.source_id,
-            "input": job.input_text,
-            "source_language": job.source_language,
-            "target_languages": job.target_language_ids,
-            "format": job.format  # Include format in the message
+            "source_id": job["source_id"],
+            "input": job["input_text"],
+            "source_language": job["source_language"],
+            "target_languages": job["target_language_ids"],
+            "format": job["format"]  # Include format in the message
         }
         
         # Get the translation topic from workflow config
         workflow = await workflow_db_service.get_workflow_config(session, "translation")
         if workflow and workflow["steps"]:
-            topic = workflow["steps"][0]["topic"]
-            asyncio.create_task(kafka_service.send_message(topic, message, key=job.source_id))
-            logger.info(f"Sent translation job {job.source_id} to topic '{topic}' with format: {job.format}")
+            topic = workflow["steps"][0].topic
+            await kafka_service.send_message(
+                topic, message, key=job["source_id"],
+                on_error=partial(self._on_translation_delivery_failed, job["source_id"])
+            )
+            logger.info("Sent translation job %s to topic '%s' with format: %s", job['source_id'], topic, job['format'])
     
-    async def _update_job_with_response(self, job: TranscriptionAndTranslationJob, data: dict):
-        """Update job with response data based on what's in the response"""
+    def _response_fields(self, data: dict) -> Dict[str, Any]:
+        """Map response data onto the transcription job columns it updates"""
+        fields = {}
+        
         # Update transcription if present
         if "output" in data:
-            job.transcription = data["output"]
-            logger.info(f"Updated transcription for job {job.source_id}")
+            fields["transcription"] = data["output"]
             
         # Update translations if present  
         if "translations" in data:
-            job.translations = data["translations"]
-            logger.info(f"Updated translations for job {job.source_id}")
+            fields["translations"] = data["translations"]
             
         # You can add more response field mappings here as needed
+        return fields
         
-    async def _advance_workflow(self, session: AsyncSession, job: TranscriptionAndTranslationJob):
-        """Move job to next step in workflow"""
-        workflow = await workflow_db_service.get_workflow_config(session, job.source_type)
+    async def _advance_workflow(self, session: AsyncSession, source_id: str, source_type: str, next_step: int):
+        """Finish the step the job just completed and send it on to next_step"""
+        workflow = await workflow_db_service.get_workflow_config(session, source_type)
         if not workflow:
-            logger.error(f"No workflow found for source_type: {job.source_type}")
-            job.source_status = JobStatus.ERROR
-            await session.commit()
+            logger.error("No workflow found for source_type: %s", source_type)
+            await self._set_job_status(session, source_id, JobStatus.ERROR)
             return
             
-        current_step = int(job.workflow_step)
-        next_step = current_step + 1
         steps = workflow["steps"]
         
         # Check if workflow is complete
         if next_step >= len(steps):
-            logger.info(f"Workflow complete for job {job.source_id}")
-            job.source_status = JobStatus.DONE
-            await session.commit()
+            logger.info("Workflow complete for job %s", source_id)
+            await self._set_job_status(session, source_id, JobStatus.DONE)
             return
         
-        # Move to next step
-        job.workflow_step = str(next_step)
+        # Commit before sending: the next service reads the job from the database
+        await session.execute(_SET_WORKFLOW_STEP_STMT, {"job_source_id": source_id, "new_workflow_step": str(next_step)})
         await session.commit()
         
         # Send to next step
-        await self._send_to_step(job, next_step, workflow)
-        logger.info(f"Advanced job {job.source_id} to step {next_step}")
+        await self._send_to_step(source_id, source_type, next_step, workflow)
+        logger.info("Advanced job %s to step %s", source_id, next_step)
+    
+    async def _set_job_status(self, session: AsyncSession, source_id: str, status: JobStatus):
+        """Set a transcription job's status and commit"""
+        await session.execute(_SET_JOB_STATUS_STMT, {"job_source_id": source_id, "new_status": status})
+        await session.commit()
     
-    async def _send_to_step(self, job: TranscriptionAndTranslationJob, step_index: int, workflow: dict):
+    async def _send_to_step(self, source_id: str, source_type: str, step_index: int, workflow: dict):
         """Send job data to a specific workflow step"""
         steps = workflow["steps"]
         if step_index >= len(steps):
-            logger.error(f"Invalid step {step_index} for workflow {job.source_type}")
+            logger.error("Invalid step %s for workflow %s", step_index, source_type)
             return
             
         step = steps[step_index]
-        topic = step["topic"]
+        topic = step.topic
         
         # Only send the source_id - services can query the database for full data
         message = {
-            "source_id": job.source_id
+            "source_id": source_id
         }
         
-        await kafka_service.send_message(topic, message, key=job.source_id)
-        logger.info(f"Sent job {job.source_id} to topic '{topic}' (step {step_index})")
+        await kafka_service.send_message(
+            topic, message, key=source_id,
+            on_error=partial(self._on_step_delivery_failed, source_id)
+        )
+        logger.info("Sent job %s to topic '%s' (step %s)", source_id, topic, step_index)
+    
+    def _on_translation_delivery_failed(self, source_id: str, error: KafkaError):
+        """Fail a translation job whose message Kafka could not deliver, and its waiting request"""
+        logger.error("Could not deliver translation job %s: %s", source_id, error)
+        translation_response_handler.fail_request(source_id, KafkaException(error))
+        self._run_in_background(self._fail_translation_job(source_id))
+    
+    async def _fail_translation_job(self, source_id: str):
+        """Mark a translation job as failed in its own short-lived session"""
+        async with async_session() as session:
+            await session.execute(_SET_TRANSLATION_STATUS_STMT, {"job_source_id": source_id, "new_status": JobStatus.ERROR})
+            await session.commit()
+    
+    def _on_step_delivery_failed(self, source_id: str, error: KafkaError):
+        """Fail a workflow job whose message to its next step Kafka could not deliver"""
+        logger.error("Could not deliver job %s to its next step: %s", source_id, error)
+        self._run_in_background(self._fail_job(source_id))
     
     async def get_response_topics(self, session: AsyncSession):
         """Get all response topics from database workflows for consumer registration"""
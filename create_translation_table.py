@@ -1,12 +1,18 @@
 # create_translation_table.py
 import asyncio
+import os
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from app.config import settings
 from app.database.models import Base, TranslationJob
 
 async def create_translation_table():
-    engine = create_async_engine(settings.DATABASE_URL, echo=True)
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        poolclass=NullPool,  # one-shot script, don't keep idle connections around
+    )
     
     async with engine.begin() as conn:
         # Create the new translation_jobs table
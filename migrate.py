@@ -5,7 +5,10 @@ Run this after updating the models.py file.
 
 import asyncio
 import logging
+import os
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy import text
 from app.config import settings
 from app.database.models import Base
 
@@ -16,12 +19,19 @@ async def run_migration():
     """Create the new tables"""
     engine = create_async_engine(
         settings.DATABASE_URL,
-        echo=True,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        poolclass=NullPool,  # one-shot script, don't keep idle connections around
     )
     
     async with engine.begin() as conn:
         # Create only the new tables
         await conn.run_sync(Base.metadata.create_all)
+        
+        # create_all skips indexes on tables that already exist
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_workflow_steps_workflow_id_step_order "
+            "ON workflow_steps (workflow_id, step_order)"
+        ))
         logger.info("Migration completed - new tables created")
     
     await engine.dispose()
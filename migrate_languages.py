@@ -5,7 +5,9 @@ Run this after updating the models.py file.
 
 import asyncio
 import logging
+import os
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from app.config import settings
 from app.database.models import Base
 
@@ -16,7 +18,8 @@ async def run_migration():
     """Create the languages table"""
     engine = create_async_engine(
         settings.DATABASE_URL,
-        echo=True,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        poolclass=NullPool,  # one-shot script, don't keep idle connections around
     )
     
     async with engine.begin() as conn:
@@ -0,0 +1,26 @@
+"""
+Script to populate both the languages and the workflow/route configuration tables.
+The two scripts write disjoint tables, so they run concurrently.
+"""
+
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import populate_languages
+import populate_workflows
+
+async def main():
+    """Populate languages and workflows side by side, then verify both"""
+    engine = populate_workflows.create_engine()
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        await asyncio.gather(
+            populate_languages.populate_languages(async_session),
+            populate_workflows.populate_workflows(async_session)
+        )
+        await populate_languages.verify_population(async_session)
+        await populate_workflows.verify_population(async_session)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,8 +5,10 @@ Run this script after creating the languages table.
 
 import asyncio
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import os
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.config import settings
 from app.database.models import Language
 
@@ -43,15 +45,30 @@ LANGUAGES_DATA = {
     "fi": {"name": "Finnish", "translationTarget": "deepl"}
 }
 
-async def populate_languages():
+# LANGUAGES_DATA as rows of the languages table, built once
+LANGUAGES_ROWS = [
+    {
+        "code": code,
+        "name": lang_data["name"],
+        "translation_target": lang_data["translationTarget"],
+        "is_active": True
+    }
+    for code, lang_data in LANGUAGES_DATA.items()
+]
+
+def create_engine() -> AsyncEngine:
+    """Create the engine shared by the population and verification steps"""
+    return create_async_engine(
+        settings.DATABASE_URL,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        # Population and verification reuse a connection; populate_all.py needs at most two
+        pool_size=2,
+        max_overflow=0,
+    )
+
+async def populate_languages(async_session: async_sessionmaker):
     """Populate the database with language configurations"""
     
-    # Create async engine
-    engine = create_async_engine(settings.DATABASE_URL, echo=True)
-    
-    # Create async session factory
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
     async with async_session() as session:
         try:
             logger.info("Starting language population...")
@@ -62,67 +79,58 @@ async def populate_languages():
             # await session.execute(text("DELETE FROM languages"))
             # await session.commit()
             
-            # Add each language
-            languages_added = 0
-            languages_skipped = 0
+            # Let the primary key skip languages that already exist, and read back
+            # the codes that were actually inserted, in a single Core statement
+            languages = Language.__table__
+            result = await session.execute(
+                pg_insert(languages)
+                .values(LANGUAGES_ROWS)
+                .on_conflict_do_nothing(index_elements=[languages.c.code])
+                .returning(languages.c.code)
+            )
+            added = set(result.scalars())
             
             for code, lang_data in LANGUAGES_DATA.items():
-                # Check if language already exists
-                existing = await session.get(Language, code)
-                if existing:
-                    logger.info(f"Language {code} already exists, skipping...")
-                    languages_skipped += 1
-                    continue
-                
-                logger.info(f"Adding language: {code} - {lang_data['name']}")
-                
-                language = Language(
-                    code=code,
-                    name=lang_data["name"],
-                    translation_target=lang_data["translationTarget"],
-                    is_active=True
-                )
-                session.add(language)
-                languages_added += 1
+                if code in added:
+                    logger.debug("Added language: %s - %s", code, lang_data['name'])
+                else:
+                    logger.debug("Language %s already exists, skipping...", code)
+            languages_added = len(added)
+            languages_skipped = len(LANGUAGES_DATA) - languages_added
             
             # Commit all changes
             await session.commit()
-            logger.info(f"Successfully populated database! Added: {languages_added}, Skipped: {languages_skipped}")
+            logger.info("Successfully populated database! Added: %s, Skipped: %s", languages_added, languages_skipped)
             
         except Exception as e:
-            logger.error(f"Error populating languages: {str(e)}")
+            logger.error("Error populating languages: %s", e)
             await session.rollback()
             raise
         finally:
             await session.close()
-    
-    await engine.dispose()
 
-async def verify_population():
+async def verify_population(async_session: async_sessionmaker):
     """Verify that the languages were populated correctly"""
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
     async with async_session() as session:
-        from sqlalchemy import select, func
+        # The session runs every check below in one transaction; have asyncpg open it as BEGIN READ ONLY
+        await session.connection(execution_options={"postgresql_readonly": True})
         
-        # Count total languages
-        stmt = select(func.count(Language.code)).where(Language.is_active == True)
-        result = await session.execute(stmt)
-        total_count = result.scalar()
-        
-        logger.info(f"\n=== VERIFICATION ===")
-        logger.info(f"Total active languages: {total_count}")
+        from sqlalchemy import func
         
-        # Get languages by translation target
+        # Count languages by translation target; the total is their sum
         stmt = select(Language.translation_target, func.count(Language.code)).where(
             Language.is_active == True
         ).group_by(Language.translation_target)
         result = await session.execute(stmt)
+        counts = result.all()
+        total_count = sum(count for _, count in counts)
+        
+        logger.info("\n=== VERIFICATION ===")
+        logger.info("Total active languages: %s", total_count)
         
         logger.info("Languages by translation target:")
-        for target, count in result.fetchall():
-            logger.info(f"  {target}: {count} languages")
+        for target, count in counts:
+            logger.info("  %s: %s languages", target, count)
         
         # Show first few languages as sample
         stmt = select(Language).where(Language.is_active == True).limit(5)
@@ -131,13 +139,16 @@ async def verify_population():
         
         logger.info("\nSample languages:")
         for lang in languages:
-            logger.info(f"  {lang.code}: {lang.name} -> {lang.translation_target}")
-    
-    await engine.dispose()
+            logger.info("  %s: %s -> %s", lang.code, lang.name, lang.translation_target)
 
 if __name__ == "__main__":
     async def main():
-        await populate_languages()
-        await verify_population()
+        engine = create_engine()
+        async_session = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            await populate_languages(async_session)
+            await verify_population(async_session)
+        finally:
+            await engine.dispose()
     
     asyncio.run(main())
\ No newline at end of file
@@ -5,9 +5,12 @@ Run this script to migrate your existing workflows into the database.
 
 import asyncio
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import os
+import uuid
+import orjson
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from app.config import settings, WORKFLOW_CONFIG
+from app.database.db import dump_json
 from app.database.models import WorkflowConfiguration, WorkflowStep, RouteConfiguration
 
 logging.basicConfig(level=logging.INFO)
@@ -51,15 +54,22 @@ ROUTE_CONFIGS = {
     }
 }
 
-async def populate_workflows():
+def create_engine() -> AsyncEngine:
+    """Create the engine shared by the population and verification steps"""
+    return create_async_engine(
+        settings.DATABASE_URL,
+        echo=os.getenv("MIGRATION_ECHO") == "1",  # set MIGRATION_ECHO=1 to log every statement
+        # Population and verification reuse a connection; populate_all.py needs at most two
+        pool_size=2,
+        max_overflow=0,
+        # The route parameter configs are JSON columns; encode them exactly like the app does
+        json_serializer=dump_json,
+        json_deserializer=orjson.loads,
+    )
+
+async def populate_workflows(async_session: async_sessionmaker):
     """Populate the database with workflow configurations"""
     
-    # Create async engine
-    engine = create_async_engine(settings.DATABASE_URL, echo=True)
-    
-    # Create async session factory
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
     async with async_session() as session:
         try:
             logger.info("Starting workflow population...")
@@ -67,51 +77,63 @@ async def populate_workflows():
             # Clear existing data (optional - comment out if you want to keep existing data)
             from sqlalchemy import text
             logger.info("Clearing existing workflow and route configurations...")
-            await session.execute(text("DELETE FROM workflow_steps"))
-            await session.execute(text("DELETE FROM workflow_configurations")) 
-            await session.execute(text("DELETE FROM route_configurations"))
+            # One TRUNCATE empties all three tables without scanning them row by row
+            await session.execute(text(
+                "TRUNCATE workflow_steps, workflow_configurations, route_configurations"
+            ))
             await session.commit()
             
-            # Create workflow configurations
+            # Build every row up front; workflow ids are generated here so the steps
+            # can reference them without flushing each workflow first
+            workflow_rows = []
+            step_rows = []
             for workflow_name, workflow_config in WORKFLOW_CONFIG.items():
-                logger.info(f"Creating workflow: {workflow_name}")
+                logger.debug("Creating workflow: %s", workflow_name)
                 
-                # Create workflow
-                workflow = WorkflowConfiguration(
-                    name=workflow_name,
-                    description=f"Workflow for {workflow_name} processing",
-                    is_active=True
-                )
-                session.add(workflow)
-                await session.flush()  # Get the ID
+                workflow_id = str(uuid.uuid4())
+                workflow_rows.append({
+                    "id": workflow_id,
+                    "name": workflow_name,
+                    "description": f"Workflow for {workflow_name} processing",
+                    "is_active": True
+                })
                 
                 # Create workflow steps
                 steps = workflow_config.get("steps", [])
                 for step_index, step_config in enumerate(steps):
-                    logger.info(f"  Creating step {step_index}: {step_config['topic']}")
+                    logger.debug("  Creating step %s: %s", step_index, step_config['topic'])
                     
-                    step = WorkflowStep(
-                        workflow_id=workflow.id,
-                        step_order=step_index,
-                        topic=step_config["topic"],
-                        response_topic=step_config["response_topic"],
-                        description=f"Step {step_index} - {step_config['topic']}"
-                    )
-                    session.add(step)
+                    step_rows.append({
+                        "workflow_id": workflow_id,
+                        "step_order": step_index,
+                        "topic": step_config["topic"],
+                        "response_topic": step_config["response_topic"],
+                        "description": f"Step {step_index} - {step_config['topic']}"
+                    })
             
             # Create route configurations
+            route_rows = []
             for route_path, route_config in ROUTE_CONFIGS.items():
-                logger.info(f"Creating route configuration: {route_path}")
+                logger.debug("Creating route configuration: %s", route_path)
                 
-                route = RouteConfiguration(
-                    route_path=route_path,
-                    workflow_name=route_config["workflow_name"],
-                    required_parameters=route_config["required_parameters"],
-                    optional_parameters=route_config["optional_parameters"],
-                    description=route_config["description"],
-                    is_active=True
-                )
-                session.add(route)
+                route_rows.append({
+                    "route_path": route_path,
+                    "workflow_name": route_config["workflow_name"],
+                    "required_parameters": route_config["required_parameters"],
+                    "optional_parameters": route_config["optional_parameters"],
+                    "description": route_config["description"],
+                    "is_active": True
+                })
+            
+            # One Core executemany insert per table, parents first; the rows are
+            # plain dicts, so there's no need to go through the ORM's bulk path
+            for model, rows in (
+                (WorkflowConfiguration, workflow_rows),
+                (WorkflowStep, step_rows),
+                (RouteConfiguration, route_rows),
+            ):
+                if rows:
+                    await session.execute(model.__table__.insert(), rows)
             
             # Commit all changes
             await session.commit()
@@ -120,52 +142,49 @@ async def populate_workflows():
             # Verify what was created
             from sqlalchemy import text
             
-            # Count workflows
-            result = await session.execute(text("SELECT COUNT(*) FROM workflow_configurations"))
-            workflow_count = result.scalar()
-            
-            # Count steps
-            result = await session.execute(text("SELECT COUNT(*) FROM workflow_steps"))
-            step_count = result.scalar()
-            
-            # Count routes
-            result = await session.execute(text("SELECT COUNT(*) FROM route_configurations"))
-            route_count = result.scalar()
+            # Count workflows, steps and routes in one round trip
+            result = await session.execute(text(
+                "SELECT (SELECT COUNT(*) FROM workflow_configurations), "
+                "(SELECT COUNT(*) FROM workflow_steps), "
+                "(SELECT COUNT(*) FROM route_configurations)"
+            ))
+            workflow_count, step_count, route_count = result.one()
             
-            logger.info(f"Created: {workflow_count} workflows, {step_count} steps, {route_count} routes")
+            logger.info("Created: %s workflows, %s steps, %s routes", workflow_count, step_count, route_count)
             
         except Exception as e:
-            logger.error(f"Error populating workflows: {str(e)}")
+            logger.error("Error populating workflows: %s", e)
             await session.rollback()
             raise
         finally:
             await session.close()
-    
-    await engine.dispose()
 
-async def verify_population():
+async def verify_population(async_session: async_sessionmaker):
     """Verify that the data was populated correctly"""
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
     async with async_session() as session:
+        # The session runs every check below in one transaction; have asyncpg open it as BEGIN READ ONLY
+        await session.connection(execution_options={"postgresql_readonly": True})
+        
         from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
+        from sqlalchemy.orm import selectinload, load_only
         
-        # Get all workflows with their steps
+        # Get all workflows with their steps, loading only the columns printed below
         stmt = select(WorkflowConfiguration).options(
-            selectinload(WorkflowConfiguration.steps)
-        ).where(WorkflowConfiguration.is_active == True)
+            load_only(WorkflowConfiguration.name),
+            selectinload(WorkflowConfiguration.steps).load_only(
+                WorkflowStep.step_order, WorkflowStep.topic, WorkflowStep.response_topic
+            )
+        ).where(WorkflowConfiguration.is_active == True).order_by(WorkflowConfiguration.name)
         
         result = await session.execute(stmt)
         workflows = result.scalars().all()
         
         logger.info("\n=== VERIFICATION ===")
         for workflow in workflows:
-            logger.info(f"Workflow: {workflow.name}")
-            sorted_steps = sorted(workflow.steps, key=lambda s: s.step_order)
-            for step in sorted_steps:
-                logger.info(f"  Step {step.step_order}: {step.topic} -> {step.response_topic}")
+            logger.info("Workflow: %s", workflow.name)
+            # The steps relationship is ordered by step_order in SQL
+            for step in workflow.steps:
+                logger.info("  Step %s: %s -> %s", step.step_order, step.topic, step.response_topic)
         
         # Get all route configurations
         stmt = select(RouteConfiguration).where(RouteConfiguration.is_active == True)
@@ -174,15 +193,18 @@ async def verify_population():
         
         logger.info("\nRoute Configurations:")
         for route in routes:
-            logger.info(f"  {route.route_path} -> {route.workflow_name}")
-            logger.info(f"    Required: {list(route.required_parameters.keys())}")
-            logger.info(f"    Optional: {list(route.optional_parameters.keys()) if route.optional_parameters else []}")
-    
-    await engine.dispose()
+            logger.info("  %s -> %s", route.route_path, route.workflow_name)
+            logger.info("    Required: %s", list(route.required_parameters.keys()))
+            logger.info("    Optional: %s", list(route.optional_parameters.keys()) if route.optional_parameters else [])
 
 if __name__ == "__main__":
     async def main():
-        await populate_workflows()
-        await verify_population()
+        engine = create_engine()
+        async_session = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            await populate_workflows(async_session)
+            await verify_population(async_session)
+        finally:
+            await engine.dispose()
     
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.database.models import Language
+from app.services import job_commit_queue as queue_module
+
+def _language(code: str):
+    return {"code": code, "name": code, "translation_target": "deepl"}
+
+def test_bad_row_only_fails_its_own_submitter(monkeypatch):
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Language.__table__.create)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(queue_module, "async_session", session_factory)
+
+        async with session_factory() as session:
+            await session.execute(Language.__table__.insert(), [_language("de")])
+            await session.commit()
+
+        # A long delay so all three rows land in the same batch
+        queue = queue_module.JobCommitQueue(batch_size=3, max_delay=1.0)
+        await queue.start()
+        results = await asyncio.gather(
+            queue.submit(Language, _language("es")),
+            queue.submit(Language, _language("de")),
+            queue.submit(Language, _language("fr")),
+            return_exceptions=True
+        )
+        await queue.stop()
+
+        async with session_factory() as session:
+            count = (await session.execute(select(func.count()).select_from(Language))).scalar()
+        await engine.dispose()
+        return results, count
+
+    results, count = asyncio.run(run())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], IntegrityError)
+    assert count == 3
+
+def test_submit_before_start_raises():
+    queue = queue_module.JobCommitQueue()
+    with pytest.raises(RuntimeError):
+        asyncio.run(queue.submit(Language, _language("de")))
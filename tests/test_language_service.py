@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+from app.database.models import Language
+from app.services.language_service import LanguageService
+from app.services.ttl_cache import TTLCache
+
+class _SlowSession:
+    """Stands in for an AsyncSession; counts queries and takes a moment to answer each"""
+
+    def __init__(self, languages):
+        self.languages = languages
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(self.languages)))
+
+LANGUAGES = [
+    Language(code="de", name="German", translation_target="deepl"),
+    Language(code="en", name="English", translation_target="deepl"),
+]
+
+def test_concurrent_lookups_share_one_snapshot_load():
+    service = LanguageService()
+    session = _SlowSession(LANGUAGES)
+
+    async def run():
+        return await asyncio.gather(*(service.get_languages_by_code(session) for _ in range(10)))
+    snapshots = asyncio.run(run())
+
+    assert session.queries == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert list(snapshots[0]) == ["de", "en"]
+
+def test_snapshot_is_reloaded_after_it_expires():
+    service = LanguageService()
+    service._cache = TTLCache(ttl=0.1)
+    session = _SlowSession(LANGUAGES)
+
+    async def run():
+        await service.get_translation_targets(session)
+        await service.get_translation_targets(session)
+        await asyncio.sleep(0.2)
+        return await service.get_translation_targets(session)
+    targets = asyncio.run(run())
+
+    assert session.queries == 2
+    assert targets == {"de": "deepl", "en": "deepl"}
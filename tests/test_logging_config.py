@@ -0,0 +1,17 @@
+import logging
+from logging.handlers import QueueHandler
+from app import logging_config
+
+def _queue_handlers():
+    return [handler for handler in logging.getLogger().handlers if isinstance(handler, QueueHandler)]
+
+def test_stop_logging_detaches_the_queue_handlers_so_setup_can_run_again():
+    level = logging.getLogger().level
+    try:
+        for _ in range(2):
+            logging_config.setup_console_logging(logging.INFO)
+            assert len(_queue_handlers()) == 1
+            logging_config.stop_logging()
+            assert _queue_handlers() == []
+    finally:
+        logging.getLogger().setLevel(level)
@@ -0,0 +1,61 @@
+import fastjsonschema
+import pytest
+from app.services import parameter_validation
+from app.services.parameter_validation import JsonSchemaValueException, build_parameter_schema, compile_parameter_validator
+
+REQUIRED = {"language": {"type": "string", "description": "spoken language"}, "count": {"type": "integer"}}
+OPTIONAL = {"format": {"type": "string", "enum": ["srt", "vtt"]}, "ratio": {"type": "number"}, "flags": {"type": "object"}}
+
+CASES = [
+    {"language": "en", "count": 1},
+    {"language": "en", "count": 1, "format": "srt", "ratio": 0.5, "flags": {}},
+    {"language": "en"},
+    {"count": 1},
+    {"language": 3, "count": 1},
+    {"language": "en", "count": True},
+    {"language": "en", "count": 1.5},
+    {"language": "en", "count": 1, "format": "txt"},
+    {"language": "en", "count": 1, "ratio": False},
+    {"language": "en", "count": 1, "flags": []},
+    ["not", "an", "object"],
+]
+
+def _outcome(validator, data):
+    """What a validator does with data: the data back, or the error message"""
+    try:
+        return validator(data)
+    except JsonSchemaValueException as e:
+        return str(e)
+
+def test_flat_configs_use_the_generated_validator():
+    assert parameter_validation._generate_source(REQUIRED, OPTIONAL) is not None
+
+@pytest.mark.parametrize("data", CASES)
+def test_generated_validator_agrees_with_fastjsonschema(data):
+    generated = compile_parameter_validator(REQUIRED, OPTIONAL)
+    reference = fastjsonschema.compile(build_parameter_schema(REQUIRED, OPTIONAL))
+    assert _outcome(generated, data) == _outcome(reference, data)
+
+def test_type_list_falls_back_to_fastjsonschema():
+    optional = {"note": {"type": ["string", "null"]}}
+    assert parameter_validation._generate_source({}, optional) is None
+
+    validate = compile_parameter_validator({}, optional)
+    assert validate({"note": None}) == {"note": None}
+    assert validate({"note": "hi"}) == {"note": "hi"}
+    with pytest.raises(JsonSchemaValueException):
+        validate({"note": 1})
+
+@pytest.mark.parametrize("enum, accepted, rejected", [
+    ([1, 2], [1, 2, 1.0], [True, False, "1", None]),
+    ([True], [True], [1, 1.0, "true"]),
+    ([0, None], [0, None, 0.0], [False, ""]),
+    (["a", 1.5], ["a", 1.5], [True, "b"]),
+])
+def test_enum_compares_type_as_well_as_value(enum, accepted, rejected):
+    validate = compile_parameter_validator({"x": {"enum": enum}}, {})
+    for value in accepted:
+        assert validate({"x": value}) == {"x": value}
+    for value in rejected:
+        with pytest.raises(JsonSchemaValueException):
+            validate({"x": value})
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from app.services.translation_response_handler import TranslationResponseHandler
+
+def _run_with_sweeper(test):
+    """Run a test coroutine against a fresh handler whose sweeper is running"""
+    async def run():
+        handler = TranslationResponseHandler(default_ttl=10.0)
+        await handler.start()
+        try:
+            await test(handler)
+        finally:
+            await handler.stop()
+    asyncio.run(run())
+
+def test_sweeper_cancels_requests_at_their_deadline():
+    async def test(handler):
+        future = handler.register_request("tr", ttl=0.05)
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(future, timeout=1.0)
+        assert "tr" not in handler._pending_requests
+    _run_with_sweeper(test)
+
+def test_earlier_deadline_wakes_the_sweeper():
+    async def test(handler):
+        late = handler.register_request("late")
+        # Let the sweeper go to sleep on the 10 second deadline first
+        await asyncio.sleep(0.01)
+        early = handler.register_request("early", ttl=0.05)
+
+        await asyncio.sleep(0.3)
+        assert early.cancelled()
+        assert not late.done()
+        assert list(handler._pending_requests) == ["late"]
+    _run_with_sweeper(test)
+
+def test_reregistered_request_keeps_its_new_deadline():
+    async def test(handler):
+        first = handler.register_request("tr", ttl=0.05)
+        second = handler.register_request("tr", ttl=10.0)
+
+        await asyncio.sleep(0.3)
+        assert not second.done()
+        assert handler._pending_requests["tr"][1] is second
+        first.cancel()
+    _run_with_sweeper(test)
+
+def test_response_completes_and_drops_the_request():
+    async def test(handler):
+        future = handler.register_request("tr")
+        await handler.handle_response("tr", {"status": "completed"})
+        assert await future == {"status": "completed"}
+        assert not handler._pending_requests
+    _run_with_sweeper(test)
+
+def test_fail_request_fails_the_future_and_drops_the_request():
+    async def test(handler):
+        future = handler.register_request("tr")
+        handler.fail_request("tr", RuntimeError("not delivered"))
+        with pytest.raises(RuntimeError, match="not delivered"):
+            await future
+        assert not handler._pending_requests
+
+        # Failing a request that is no longer pending is a no-op
+        handler.fail_request("tr", RuntimeError("again"))
+    _run_with_sweeper(test)
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+import pytest
+from app.services import ttl_cache as ttl_cache_module
+from app.services import job_status_cache as job_status_cache_module
+from app.services.ttl_cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test moves forward by hand"""
+    now = SimpleNamespace(value=100.0)
+    monkeypatch.setattr(ttl_cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("key", "value")
+
+    clock.value += 9.9
+    assert cache.get("key") == "value"
+    clock.value += 0.1
+    assert cache.get("key") is None
+    # The stale entry is dropped, not just hidden
+    assert len(cache) == 0
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+
+    clock.value += 5
+    assert cache.get("short", "missing") == "missing"
+    assert cache.get("long") == 2
+
+def test_setting_again_restarts_the_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("key", 1)
+    clock.value += 8
+    cache.set("key", 2)
+
+    clock.value += 8
+    assert cache.get("key") == 2
+
+def test_maxsize_evicts_the_oldest_entry(clock):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)  # re-set, so "b" is now the oldest
+    cache.set("c", 4)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (3, 4)
+
+def test_invalidate_job_status_drops_full_and_status_only_entries(monkeypatch):
+    cache = TTLCache(ttl=10)
+    monkeypatch.setattr(job_status_cache_module, "job_status_cache", cache)
+    cache.set(("job", True), {"status": "in_progress", "transcription": None})
+    cache.set(("job", False), {"status": "in_progress"})
+    cache.set(("other", True), {"status": "done"})
+
+    job_status_cache_module.invalidate_job_status("job")
+
+    assert cache.get(("job", True)) is None
+    assert cache.get(("job", False)) is None
+    assert cache.get(("other", True)) == {"status": "done"}
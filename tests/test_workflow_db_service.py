@@ -0,0 +1,26 @@
+import asyncio
+from types import SimpleNamespace
+from app.services.workflow_db_service import WorkflowDatabaseService
+
+def _route(required, optional):
+    return SimpleNamespace(
+        route_path="/transcription/test", workflow_name="peertube",
+        required_parameters=required, optional_parameters=optional
+    )
+
+def _validate(service, parameters):
+    return asyncio.run(service.validate_route_parameters(None, "/transcription/test", parameters))
+
+def test_route_with_unknown_type_falls_back_to_required_check():
+    service = WorkflowDatabaseService()
+    service._cache_route(_route({"url": {"type": "url"}}, {"quality": {"type": "bitrate"}}))
+
+    assert _validate(service, {"url": "https://example.org", "quality": 1})["valid"]
+    assert not _validate(service, {"quality": 1})["valid"]
+
+def test_route_with_valid_schema_is_checked():
+    service = WorkflowDatabaseService()
+    service._cache_route(_route({"url": {"type": "string"}}, {}))
+
+    assert _validate(service, {"url": "https://example.org"}) == {"valid": True, "workflow_name": "peertube"}
+    assert not _validate(service, {"url": 1})["valid"]
@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+from sqlalchemy import ARRAY, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
+from app.database.models import Base, TranscriptionAndTranslationJob, TranslationJob, JobStatus
+from app.services import workflow_service as workflow_module
+from app.services.workflow_service import KafkaError, KafkaException
+from app.services.workflow_db_service import Step
+
+@compiles(ARRAY, "sqlite")
+def _array_as_json(element, compiler, **kw):
+    """SQLite has no arrays; store them as JSON so the models' tables can be created"""
+    return "JSON"
+
+WORKFLOW = {"steps": (Step("first", "first_response"), Step("second", "second_response"))}
+
+@pytest.fixture
+def env(monkeypatch):
+    """Run the workflow service against an in-memory SQLite database with Kafka stubbed out"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    sent, on_errors, answered = [], [], []
+    workflows = {"peertube": WORKFLOW}
+
+    async def get_workflow_config(session, name):
+        return workflows.get(name)
+
+    async def send_message(topic, message, key=None, on_error=None):
+        sent.append((topic, message))
+        on_errors.append(on_error)
+
+    async def handle_response(source_id, response):
+        answered.append((source_id, response))
+
+    monkeypatch.setattr(workflow_module, "async_session", session_factory)
+    monkeypatch.setattr(workflow_module.workflow_db_service, "get_workflow_config", get_workflow_config)
+    monkeypatch.setattr(workflow_module.kafka_service, "send_message", send_message)
+    monkeypatch.setattr(workflow_module.translation_response_handler, "handle_response", handle_response)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    asyncio.run(setup())
+
+    yield {"session": session_factory, "sent": sent, "on_errors": on_errors, "answered": answered, "workflows": workflows}
+    asyncio.run(engine.dispose())
+
+def _run(env, coro_factory):
+    """Run a coroutine that needs the fixture's session factory"""
+    return asyncio.run(coro_factory(env["session"]))
+
+def _add_transcription_job(env, step: str):
+    async def add(session_factory):
+        async with session_factory() as session:
+            session.add(TranscriptionAndTranslationJob(source_id="job", source_type="peertube", url="u", workflow_step=step))
+            await session.commit()
+    _run(env, add)
+
+def _load(env, model):
+    async def load(session_factory):
+        async with session_factory() as session:
+            return (await session.execute(select(model))).scalar_one()
+    return _run(env, load)
+
+def _respond(data):
+    asyncio.run(workflow_module.workflow_service.process_response("topic", data))
+
+@pytest.mark.parametrize("columns", [(), ("transcription",), ("transcription", "translations")])
+def test_transcription_response_statement_compiles_for_postgres(columns):
+    stmt = workflow_module._transcription_response_statement(columns)
+    stmt.compile(dialect=postgresql.asyncpg.dialect())
+
+@pytest.mark.parametrize("name", [
+    "_TRANSLATION_RESPONSE_STMT", "_SET_WORKFLOW_STEP_STMT", "_SET_JOB_STATUS_STMT", "_SET_TRANSLATION_STATUS_STMT"
+])
+def test_prebuilt_statement_compiles_for_postgres(name):
+    getattr(workflow_module, name).compile(dialect=postgresql.asyncpg.dialect())
+
+def test_failed_background_start_marks_job_error(env, monkeypatch):
+    _add_transcription_job(env, "0")
+
+    async def broken_workflow(session, name):
+        raise RuntimeError("config unavailable")
+    monkeypatch.setattr(workflow_module.workflow_db_service, "get_workflow_config", broken_workflow)
+
+    asyncio.run(workflow_module.workflow_service.start_job_by_id("job"))
+
+    assert _load(env, TranscriptionAndTranslationJob).source_status == JobStatus.ERROR
+
+def test_failed_delivery_to_a_step_marks_job_error(env):
+    _add_transcription_job(env, "0")
+    asyncio.run(workflow_module.workflow_service.start_job_by_id("job"))
+    assert env["sent"] == [("first", {"source_id": "job"})]
+
+    async def fail_delivery(session_factory):
+        env["on_errors"][0](KafkaError(KafkaError._MSG_TIMED_OUT))
+        # Let the background task that records the error run
+        await asyncio.gather(*workflow_module.workflow_service._background_tasks)
+    _run(env, fail_delivery)
+
+    assert _load(env, TranscriptionAndTranslationJob).source_status == JobStatus.ERROR
+
+def test_failed_delivery_fails_pending_translation_request():
+    handler = workflow_module.translation_response_handler
+
+    async def run():
+        future = handler.register_request("tr")
+        handler.fail_request("tr", KafkaException(KafkaError(KafkaError._MSG_TIMED_OUT)))
+        with pytest.raises(KafkaException):
+            await asyncio.wait_for(future, timeout=1.0)
+    asyncio.run(run())
+
+def test_response_stores_results_and_advances_to_next_step(env):
+    _add_transcription_job(env, "0")
+    _respond({"source_id": "job", "output": {"text": "hello"}})
+
+    job = _load(env, TranscriptionAndTranslationJob)
+    assert job.transcription == {"text": "hello"}
+    assert job.workflow_step == "1"
+    assert job.source_status == JobStatus.IN_PROGRESS
+    assert env["sent"] == [("second", {"source_id": "job"})]
+
+def test_response_to_last_step_finishes_without_advancing(env):
+    _add_transcription_job(env, "1")
+    _respond({"source_id": "job", "translations": {"es": "hola"}})
+
+    job = _load(env, TranscriptionAndTranslationJob)
+    assert job.translations == {"es": "hola"}
+    assert job.workflow_step == "1"
+    assert job.source_status == JobStatus.DONE
+    assert env["sent"] == []
+
+def test_response_without_results_still_advances(env):
+    _add_transcription_job(env, "0")
+    _respond({"source_id": "job"})
+
+    job = _load(env, TranscriptionAndTranslationJob)
+    assert job.workflow_step == "1"
+    assert env["sent"] == [("second", {"source_id": "job"})]
+
+def test_response_for_missing_workflow_marks_job_error(env):
+    env["workflows"].clear()
+    _add_transcription_job(env, "0")
+    _respond({"source_id": "job", "output": "text"})
+
+    job = _load(env, TranscriptionAndTranslationJob)
+    assert job.workflow_step == "0"
+    assert job.source_status == JobStatus.ERROR
+
+def test_translation_response_finishes_translation_job(env):
+    async def add(session_factory):
+        async with session_factory() as session:
+            # Raw SQL, because SQLite can't bind the ARRAY column's list
+            await session.execute(text(
+                "INSERT INTO translation_jobs (source_id, source_type, source_language, target_language_ids, "
+                "input_text, translations, status, workflow_step) "
+                "VALUES ('tr', 'translation', 'en', '[\"es\"]', 'hello', '{\"es\": \"hola\"}', 'IN_PROGRESS', '0')"
+            ))
+            await session.commit()
+    _run(env, add)
+
+    _respond({"source_id": "tr", "success": True, "type": "translations"})
+
+    assert _load(env, TranslationJob).status == JobStatus.DONE
+    assert env["answered"] == [("tr", {"source_id": "tr", "translations": {"es": "hola"}, "status": "completed"})]